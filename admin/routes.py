@@ -0,0 +1,37 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from config import getEnv
+from profiler import format_collapsed, profiling_lock, sample_stacks
+from security.admin import verify_admin_token
+from slow_queries import SlowQuery, slow_query_log
+
+adminRouter = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"],
+    dependencies=[Depends(verify_admin_token)],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@adminRouter.get("/slow-queries")
+async def get_slow_queries() -> list[SlowQuery]:
+    return slow_query_log.list()
+
+
+@adminRouter.post("/clear-slow-queries")
+async def clear_slow_queries():
+    slow_query_log.entries.clear()
+
+
+@adminRouter.get("/profile", response_class=PlainTextResponse)
+async def profile_process(seconds: float = 10, interval_ms: float = 5) -> PlainTextResponse:
+    if seconds <= 0 or seconds > getEnv().profiler_max_seconds or interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="Nieprawidłowe parametry profilowania")
+    if not profiling_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Profilowanie jest już w toku")
+    try:
+        samples = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    finally:
+        profiling_lock.release()
+    return PlainTextResponse(format_collapsed(samples))
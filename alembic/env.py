@@ -10,6 +10,8 @@ from models.restaurant import RestaurantDB, RestaurantHoursDB, RestaurantFlagDB,
 from models.table import RestaurantTableDB, RestaurantBorderDB
 from models.menu import RestaurantMenuCategoryDB, RestaurantMenuItemDB
 from models.reservation import ReservationDB
+from models.outbox import OutboxDB
+from models.photo import PhotoDB, PhotoDeletionDB
 from config import Base
 
 # this is the Alembic Config object, which provides
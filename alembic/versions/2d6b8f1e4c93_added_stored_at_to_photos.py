@@ -0,0 +1,28 @@
+"""Added stored at to photos
+
+Revision ID: 2d6b8f1e4c93
+Revises: e4a9c7b2d518
+Create Date: 2026-10-21 09:14:37.502816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d6b8f1e4c93'
+down_revision: Union[str, None] = 'e4a9c7b2d518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('stored_at', sa.DateTime(), nullable=True))
+    # photos recorded before this column were only inserted after their upload
+    op.execute("UPDATE photos SET stored_at = created_at")
+
+
+def downgrade() -> None:
+    op.drop_column('photos', 'stored_at')
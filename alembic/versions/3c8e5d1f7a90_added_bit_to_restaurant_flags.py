@@ -0,0 +1,41 @@
+"""Added bit to restaurant flags
+
+Revision ID: 3c8e5d1f7a90
+Revises: 9e4f7a0b12c8
+Create Date: 2026-10-20 09:14:05.528611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8e5d1f7a90'
+down_revision: Union[str, None] = '9e4f7a0b12c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('restaurant_flags', sa.Column('bit', sa.Integer(), nullable=True))
+    op.execute("UPDATE restaurant_flags SET bit = id - 1")
+    op.alter_column('restaurant_flags', 'bit', nullable=False)
+    op.create_unique_constraint('restaurant_flags_bit_key', 'restaurant_flags', ['bit'])
+    op.execute(
+        """
+        UPDATE restaurants SET flags_mask = COALESCE((
+            SELECT SUM(1 << restaurant_flags.bit)
+            FROM restaurant_flag_settings
+            JOIN restaurant_flags ON restaurant_flags.id = restaurant_flag_settings.flag_id
+            WHERE restaurant_flag_settings.restaurant_id = restaurants.id
+            AND restaurant_flag_settings.setting
+        ), 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('restaurant_flags_bit_key', 'restaurant_flags', type_='unique')
+    op.drop_column('restaurant_flags', 'bit')
@@ -0,0 +1,46 @@
+"""Rebuild opening hours bitmap
+
+Revision ID: 4c7e2b9a1d58
+Revises: 8f2c5a9d3e61
+Create Date: 2026-10-21 13:27:05.648193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e2b9a1d58'
+down_revision: Union[str, None] = '8f2c5a9d3e61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # partial hours updates cleared other days, and days closing at midnight were empty
+    op.execute(
+        """
+        UPDATE restaurants SET opening_hours_mask = (
+            SELECT string_agg(
+                CASE WHEN EXISTS (
+                    SELECT 1 FROM restaurant_opening_hours
+                    WHERE restaurant_opening_hours.restaurant_id = restaurants.id
+                    AND restaurant_opening_hours.day_of_week = slots.slot / 96
+                    AND NOT restaurant_opening_hours.closed
+                    AND slots.slot % 96 >= ceil(extract(epoch FROM restaurant_opening_hours.open_time) / 900)
+                    AND slots.slot % 96 < coalesce(
+                        nullif(floor(extract(epoch FROM restaurant_opening_hours.close_time) / 900), 0), 96
+                    )
+                ) THEN '1' ELSE '0' END,
+                '' ORDER BY slots.slot
+            )::bit(672)
+            FROM generate_series(0, 671) AS slots(slot)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    pass
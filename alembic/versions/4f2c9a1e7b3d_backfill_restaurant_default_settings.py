@@ -0,0 +1,49 @@
+"""Backfill restaurant default flag settings and opening hours
+
+Revision ID: 4f2c9a1e7b3d
+Revises: 2abc62d738ae
+Create Date: 2026-10-19 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2c9a1e7b3d'
+down_revision: Union[str, None] = '2abc62d738ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        INSERT INTO restaurant_flag_settings (restaurant_id, flag_id, setting)
+        SELECT restaurants.id, restaurant_flags.id, true
+        FROM restaurants CROSS JOIN restaurant_flags
+        WHERE NOT EXISTS (
+            SELECT 1 FROM restaurant_flag_settings
+            WHERE restaurant_flag_settings.restaurant_id = restaurants.id
+            AND restaurant_flag_settings.flag_id = restaurant_flags.id
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO restaurant_opening_hours (restaurant_id, day_of_week, open_time, close_time, temporary, closed)
+        SELECT restaurants.id, days.day, NULL, NULL, false, true
+        FROM restaurants CROSS JOIN generate_series(0, 6) AS days(day)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM restaurant_opening_hours
+            WHERE restaurant_opening_hours.restaurant_id = restaurants.id
+            AND restaurant_opening_hours.day_of_week = days.day
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    pass
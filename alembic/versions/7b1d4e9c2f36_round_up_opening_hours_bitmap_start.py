@@ -0,0 +1,43 @@
+"""Round up opening hours bitmap start
+
+Revision ID: 7b1d4e9c2f36
+Revises: 3c8e5d1f7a90
+Create Date: 2026-10-20 09:41:17.204953
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1d4e9c2f36'
+down_revision: Union[str, None] = '3c8e5d1f7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        UPDATE restaurants SET opening_hours_mask = (
+            SELECT string_agg(
+                CASE WHEN EXISTS (
+                    SELECT 1 FROM restaurant_opening_hours
+                    WHERE restaurant_opening_hours.restaurant_id = restaurants.id
+                    AND restaurant_opening_hours.day_of_week = slots.slot / 96
+                    AND NOT restaurant_opening_hours.closed
+                    AND slots.slot % 96 >= ceil(extract(epoch FROM restaurant_opening_hours.open_time) / 900)
+                    AND slots.slot % 96 < floor(extract(epoch FROM restaurant_opening_hours.close_time) / 900)
+                ) THEN '1' ELSE '0' END,
+                '' ORDER BY slots.slot
+            )::bit(672)
+            FROM generate_series(0, 671) AS slots(slot)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    pass
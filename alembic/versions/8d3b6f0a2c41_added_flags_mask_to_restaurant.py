@@ -0,0 +1,36 @@
+"""Added flags mask to restaurant
+
+Revision ID: 8d3b6f0a2c41
+Revises: 4f2c9a1e7b3d
+Create Date: 2026-10-19 11:02:47.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3b6f0a2c41'
+down_revision: Union[str, None] = '4f2c9a1e7b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('restaurants', sa.Column('flags_mask', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE restaurants SET flags_mask = COALESCE((
+            SELECT SUM(1 << (restaurant_flag_settings.flag_id - 1))
+            FROM restaurant_flag_settings
+            WHERE restaurant_flag_settings.restaurant_id = restaurants.id
+            AND restaurant_flag_settings.setting
+        ), 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('restaurants', 'flags_mask')
@@ -0,0 +1,26 @@
+"""Added lease to photo deletions
+
+Revision ID: 8f2c5a9d3e61
+Revises: 2d6b8f1e4c93
+Create Date: 2026-10-21 11:02:48.316904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c5a9d3e61'
+down_revision: Union[str, None] = '2d6b8f1e4c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photo_deletions', sa.Column('leased_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('photo_deletions', 'leased_until')
@@ -0,0 +1,46 @@
+"""Added opening hours bitmap to restaurant
+
+Revision ID: c51e0d7a9f86
+Revises: 8d3b6f0a2c41
+Create Date: 2026-10-19 12:20:05.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51e0d7a9f86'
+down_revision: Union[str, None] = '8d3b6f0a2c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('restaurants', sa.Column('opening_hours_mask', postgresql.BIT(length=672), server_default=sa.text("repeat('0', 672)::bit(672)"), nullable=False))
+    op.execute(
+        """
+        UPDATE restaurants SET opening_hours_mask = (
+            SELECT string_agg(
+                CASE WHEN EXISTS (
+                    SELECT 1 FROM restaurant_opening_hours
+                    WHERE restaurant_opening_hours.restaurant_id = restaurants.id
+                    AND restaurant_opening_hours.day_of_week = slots.slot / 96
+                    AND NOT restaurant_opening_hours.closed
+                    AND slots.slot % 96 >= extract(hour FROM restaurant_opening_hours.open_time) * 4
+                        + floor(extract(minute FROM restaurant_opening_hours.open_time) / 15)
+                    AND slots.slot % 96 < extract(hour FROM restaurant_opening_hours.close_time) * 4
+                        + floor(extract(minute FROM restaurant_opening_hours.close_time) / 15)
+                ) THEN '1' ELSE '0' END,
+                '' ORDER BY slots.slot
+            )::bit(672)
+            FROM generate_series(0, 671) AS slots(slot)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('restaurants', 'opening_hours_mask')
@@ -0,0 +1,26 @@
+"""Added cache version to restaurant
+
+Revision ID: e4a9c7b2d518
+Revises: 7b1d4e9c2f36
+Create Date: 2026-10-20 10:26:53.871240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c7b2d518'
+down_revision: Union[str, None] = '7b1d4e9c2f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('restaurants', sa.Column('cache_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('restaurants', 'cache_version')
@@ -0,0 +1,91 @@
+import argparse
+from collections import namedtuple
+from time import perf_counter
+
+from models.menu import RestaurantMenuItemDB, RestaurantMenuItemType, RestaurantMenuItemUser
+from models.table import RestaurantTable, RestaurantTableDB
+
+MenuItemRow = namedtuple(
+    "MenuItemRow",
+    ["id", "name", "description", "price", "order", "is_available", "photo_url"],
+)
+
+
+def tables(count: int) -> list[RestaurantTableDB]:
+    return [
+        RestaurantTableDB(
+            id=i,
+            real_id=str(i),
+            restaurant_id=1,
+            left=i,
+            top=i,
+            width=60,
+            height=60,
+            seats_top=1,
+            seats_left=1,
+            seats_right=1,
+            seats_bottom=1,
+        )
+        for i in range(count)
+    ]
+
+
+def menu_items(count: int) -> list[RestaurantMenuItemDB]:
+    return [
+        RestaurantMenuItemDB(
+            id=i,
+            category_id=1,
+            name="Pozycja " + str(i),
+            order=i,
+            description="Opis",
+            price=12.5,
+            status=RestaurantMenuItemType.available,
+            photo_url="",
+        )
+        for i in range(count)
+    ]
+
+
+def timed(function, rows) -> float:
+    start = perf_counter()
+    function(rows)
+    return perf_counter() - start
+
+
+def run(count: int) -> dict[str, float]:
+    table_rows = tables(count)
+    item_objects = menu_items(count)
+    item_rows = [
+        MenuItemRow(x.id, x.name, x.description, x.price, x.order, True, x.photo_url)
+        for x in item_objects
+    ]
+    return {
+        "table_to_dict_s": timed(
+            lambda rows: [RestaurantTable(**x.to_dict()) for x in rows], table_rows
+        ),
+        "table_model_validate_s": timed(
+            lambda rows: [RestaurantTable.model_validate(x) for x in rows], table_rows
+        ),
+        "menu_item_to_dict_s": timed(
+            lambda rows: [
+                RestaurantMenuItemUser(
+                    **x.to_dict(),
+                    is_available=x.status == RestaurantMenuItemType.available
+                )
+                for x in rows
+            ],
+            item_objects,
+        ),
+        "menu_item_row_validate_s": timed(
+            lambda rows: [RestaurantMenuItemUser.model_validate(x) for x in rows],
+            item_rows,
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+    for key, value in run(args.count).items():
+        print(f"{key}: {value:.4f}")
@@ -0,0 +1,188 @@
+import argparse
+import json
+import sys
+
+from benchmarks import micro
+
+TOLERANCES = "benchmarks/baselines/tolerances.json"
+# per-route query counts depend on the data, so this baseline is produced against the
+# seeded database instead of being committed from a developer machine:
+#   python -m benchmarks.seed
+#   python -m benchmarks.gate --manifest benchmarks/seed.json --save-queries
+# later runs with --manifest compare against it and fail while it is missing
+QUERY_BASELINE = "benchmarks/baselines/queries.json"
+
+
+def load_json(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def tolerance_for(name: str, tolerances: dict) -> float:
+    benchmark = name.split("[")[0]
+    overrides = tolerances.get("benchmarks", {})
+    return overrides.get(name, overrides.get(benchmark, tolerances.get("default", 0.2)))
+
+
+def compare_benchmarks(results: dict, baseline: dict, tolerances: dict) -> list[dict]:
+    report = []
+    for name, result in results.items():
+        if "relative" not in baseline.get(name, {}):
+            report.append(
+                {
+                    "benchmark": name,
+                    "status": "new",
+                    "min_us": result["min_us"],
+                    "relative": result["relative"],
+                }
+            )
+            continue
+        # min of the repeats, scaled by the calibration run, is far less noisy than the median
+        change = result["relative"] / baseline[name]["relative"] - 1
+        tolerance = tolerance_for(name, tolerances)
+        report.append(
+            {
+                "benchmark": name,
+                "status": "regression" if change > tolerance else "ok",
+                "min_us": result["min_us"],
+                "relative": result["relative"],
+                "baseline_relative": baseline[name]["relative"],
+                "change": change,
+                "tolerance": tolerance,
+            }
+        )
+    return report
+
+
+def measure_benchmarks(baseline: dict, tolerances: dict, repeat: int) -> list[dict]:
+    results = micro.run(repeat=repeat)
+    report = compare_benchmarks(results, baseline, tolerances)
+    # a single slow run is usually noise, so a regression has to show up twice
+    suspects = {x["benchmark"].split("[")[0] for x in report if x["status"] == "regression"}
+    if suspects:
+        for name, result in micro.run(sorted(suspects), repeat).items():
+            if result["relative"] < results[name]["relative"]:
+                results[name] = result
+        report = compare_benchmarks(results, baseline, tolerances)
+    return report
+
+
+def compare_queries(results: list[dict], baseline: dict) -> list[dict]:
+    report = []
+    for result in results:
+        previous = baseline.get(result["route"])
+        delta = None if previous is None else result["queries"] - previous
+        if result["queries"] > result["budget"] or (delta is not None and delta > 0):
+            status = "regression"
+        else:
+            status = "new" if previous is None else "ok"
+        report.append(
+            {
+                "route": result["route"],
+                "status": status,
+                "queries": result["queries"],
+                "baseline": previous,
+                "delta": delta,
+                "budget": result["budget"],
+            }
+        )
+    return report
+
+
+def accounts_from_manifest(args):
+    manifest = load_json(args.manifest)
+    if len(manifest) == 0:
+        raise SystemExit(f"no seed manifest at {args.manifest}, run python -m benchmarks.seed")
+    restaurant = manifest["restaurants"][0]
+    args.user_email = args.user_email or manifest["users"][0]
+    args.worker_email = args.worker_email or restaurant["worker"]
+    args.owner_email = args.owner_email or restaurant["owner"]
+    args.restaurant_id = args.restaurant_id or restaurant["id"]
+    args.category_id = args.category_id or restaurant["categories"][0]
+
+
+def query_counts(args) -> list[dict]:
+    # imports the app and its settings, so only needed when query counts are gated
+    from benchmarks import query_budget
+
+    return query_budget.run(
+        {
+            "user": args.user_email,
+            "worker": args.worker_email,
+            "owner": args.owner_email,
+        },
+        query_budget.route_values(args.restaurant_id, args.category_id),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", default=micro.BASELINE)
+    parser.add_argument("--tolerances", default=TOLERANCES)
+    parser.add_argument("--query-baseline", default=QUERY_BASELINE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--report", help="write the JSON report to this file")
+    parser.add_argument("--save-queries", action="store_true")
+    parser.add_argument("--manifest", help="take the accounts and ids from a seed manifest")
+    parser.add_argument("--user-email")
+    parser.add_argument("--worker-email")
+    parser.add_argument("--owner-email")
+    parser.add_argument("--restaurant-id", type=int)
+    parser.add_argument("--category-id", type=int)
+    args = parser.parse_args()
+    if args.manifest:
+        accounts_from_manifest(args)
+
+    report = {
+        "benchmarks": measure_benchmarks(
+            load_json(args.baseline), load_json(args.tolerances), args.repeat
+        ),
+        "queries": [],
+    }
+    # query counts need a seeded database, so they are only gated when accounts are given
+    if args.user_email and args.worker_email and args.owner_email:
+        counts = query_counts(args)
+        query_baseline = load_json(args.query_baseline)
+        if len(query_baseline) == 0 and not args.save_queries:
+            raise SystemExit(
+                f"no query baseline at {args.query_baseline}, rerun with --save-queries"
+            )
+        report["queries"] = compare_queries(counts, query_baseline)
+        if args.save_queries:
+            with open(args.query_baseline, "w", encoding="utf-8") as file:
+                json.dump(
+                    {x["route"]: x["queries"] for x in counts},
+                    file,
+                    indent=2,
+                    sort_keys=True,
+                )
+
+    failed = [
+        x
+        for x in report["benchmarks"] + report["queries"]
+        if x["status"] == "regression"
+    ]
+    report["passed"] = len(failed) == 0
+    output = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        print(output)
+    for entry in failed:
+        if "benchmark" in entry:
+            print(
+                f"REGRESSION {entry['benchmark']}: {entry['change']:+.1%} "
+                f"(tolerance {entry['tolerance']:.0%})",
+                file=sys.stderr,
+            )
+        else:
+            print(
+                f"REGRESSION {entry['route']}: {entry['queries']} queries "
+                f"(baseline {entry['baseline']}, budget {entry['budget']})",
+                file=sys.stderr,
+            )
+    sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+import json
+import random
+from statistics import quantiles
+from time import perf_counter
+
+import httpx
+
+
+class Context:
+    def __init__(self, manifest: dict, accounts: int, rng: random.Random):
+        self.manifest = manifest
+        self.rng = rng
+        self.restaurants = manifest["restaurants"][:accounts]
+        self.ongoing = manifest["ongoing_reservations"][:accounts]
+        self.users = list(
+            dict.fromkeys(manifest["users"][:accounts] + [x["user"] for x in self.ongoing])
+        )
+        self.tokens: dict[str, str] = {}
+
+    async def login(self, client: httpx.AsyncClient):
+        logins = [("users", x) for x in self.users] + [
+            ("workers", x["worker"]) for x in self.restaurants
+        ]
+        for role, email in logins:
+            response = await client.post(
+                f"/api/{role}/login",
+                data={"username": email, "password": self.manifest["password"]},
+            )
+            response.raise_for_status()
+            self.tokens[email] = response.json()["access_token"]
+
+    def auth(self, email: str) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[email]}"}
+
+
+async def search(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    restaurant = context.rng.choice(context.restaurants)
+    return await client.post(
+        "/api/users/restaurant-search",
+        headers=context.auth(context.rng.choice(context.users)),
+        json={
+            "search_name": "",
+            "days_available": [datetime.now().weekday()],
+            "latitude": restaurant["latitude"],
+            "longitude": restaurant["longitude"],
+            "time_start": 12,
+            "time_end": 20,
+            "guests_amount": context.rng.randint(1, 4),
+            "distance_in_km": context.rng.randint(1, 15),
+            "has_free_tables": context.rng.choice([None, True]),
+        },
+    )
+
+
+async def availability(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    day = date.today() + timedelta(days=context.rng.randint(0, 7))
+    return await client.get(
+        "/api/users/get-date-available-times",
+        headers=context.auth(context.rng.choice(context.users)),
+        params={
+            "restaurant_id": context.rng.choice(context.restaurants)["id"],
+            "date": f"{day.isoformat()}T00:00:00",
+            "guests_amount": context.rng.randint(1, 4),
+        },
+    )
+
+
+async def reserve(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    day = date.today() + timedelta(days=context.rng.randint(1, 7))
+    return await client.post(
+        "/api/users/reserve-table",
+        headers=context.auth(context.rng.choice(context.users)),
+        json={
+            "restaurant_id": context.rng.choice(context.restaurants)["id"],
+            "date": f"{day.isoformat()}T{context.rng.randint(10, 19):02d}:00:00",
+            "guests_amount": context.rng.randint(1, 4),
+        },
+    )
+
+
+async def order_update(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    reservation = context.rng.choice(context.ongoing)
+    restaurant = next(
+        x for x in context.manifest["restaurants"] if x["id"] == reservation["restaurant_id"]
+    )
+    items = context.rng.sample(restaurant["items"], 3)
+    return await client.post(
+        "/api/users/update-order",
+        headers=context.auth(reservation["user"]),
+        json={
+            "reservation_id": reservation["id"],
+            "order": {str(x): context.rng.randint(1, 3) for x in items},
+        },
+    )
+
+
+async def worker_dashboard(client: httpx.AsyncClient, context: Context) -> httpx.Response:
+    headers = context.auth(context.rng.choice(context.restaurants)["worker"])
+    responses = await asyncio.gather(
+        client.get("/api/workers/todays-reservations", headers=headers),
+        client.get("/api/workers/pending-reservations-count", headers=headers),
+        client.get("/api/workers/needing-service-reservations-count", headers=headers),
+        client.get("/api/workers/tables-coming-reservations", headers=headers),
+    )
+    return max(responses, key=lambda x: x.status_code)
+
+
+SCENARIOS = {
+    "search": search,
+    "availability": availability,
+    "reserve": reserve,
+    "order_update": order_update,
+    "worker_dashboard": worker_dashboard,
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, context: Context, scenario, concurrency: int, seconds: float
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while perf_counter() < deadline:
+            start = perf_counter()
+            try:
+                response = await scenario(client, context)
+                failed = response.status_code >= 500
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(perf_counter() - start)
+            errors += failed
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+    percentiles = quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+    }
+
+
+async def run(
+    base_url: str,
+    manifest: dict,
+    scenarios: list[str],
+    concurrency: int,
+    seconds: float,
+    accounts: int,
+    seed: int,
+) -> dict[str, dict]:
+    context = Context(manifest, accounts, random.Random(seed))
+    limits = httpx.Limits(max_connections=concurrency * 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        await context.login(client)
+        return {
+            name: await run_scenario(client, context, SCENARIOS[name], concurrency, seconds)
+            for name in scenarios
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument("--manifest", default="benchmarks/seed.json")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    with open(args.manifest, encoding="utf-8") as file:
+        manifest = json.load(file)
+    results = asyncio.run(
+        run(
+            args.base_url,
+            manifest,
+            args.scenario or list(SCENARIOS),
+            args.concurrency,
+            args.seconds,
+            args.accounts,
+            args.seed,
+        )
+    )
+    for name, result in results.items():
+        print(
+            f"{name}: {result['requests']} requests, {result['errors']} errors, "
+            f"{result['throughput_rps']:.1f} req/s, p50 {result['p50_ms']:.1f} ms, "
+            f"p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
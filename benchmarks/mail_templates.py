@@ -0,0 +1,41 @@
+import argparse
+from time import perf_counter
+from types import SimpleNamespace
+
+from mail_templates import MailTemplates
+
+
+def run(count: int) -> dict[str, float]:
+    templates = MailTemplates()
+    start = perf_counter()
+    templates.compile()
+    compile_time = perf_counter() - start
+    contexts = [
+        {
+            "worker": SimpleNamespace(first_name="Kelner" + str(i)),
+            "message": "Jutro restauracja jest zamknięta",
+            "restaurant_name": "Restauracja",
+        }
+        for i in range(count)
+    ]
+    start = perf_counter()
+    templates.render_bulk("restaurant_workers_notice", contexts)
+    bulk_time = perf_counter() - start
+    start = perf_counter()
+    for context in contexts:
+        templates.render("restaurant_workers_notice", context)
+    single_time = perf_counter() - start
+    return {
+        "compile_s": compile_time,
+        "render_bulk_s": bulk_time,
+        "render_single_s": single_time,
+        "messages_per_s": count / bulk_time,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+    for key, value in run(args.count).items():
+        print(f"{key}: {value:.4f}")
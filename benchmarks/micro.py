@@ -0,0 +1,247 @@
+import argparse
+from datetime import datetime, timedelta
+import json
+import random
+from statistics import median
+from timeit import Timer
+from types import SimpleNamespace
+from typing import Callable
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.util import LRUCache
+
+from benchmarks.query_compilation import QUERIES, compile_statement
+from models.restaurant import (
+    RestaurantFlags,
+    RestaurantHour,
+    UpdateRestaurantInfo,
+    filter_by_distance,
+)
+from models.table import (
+    PlannerInfo,
+    RestaurantBorder,
+    RestaurantBorderType,
+    RestaurantTable,
+    free_timeslots,
+)
+from models.user import validate_password
+
+BASELINE = "benchmarks/baselines/micro.json"
+
+BENCHMARKS: dict[str, tuple[Callable[[int], Callable[[], object]], tuple[int, ...]]] = (
+    {}
+)
+
+
+def benchmark(*sizes: int):
+    def register(setup: Callable[[int], Callable[[], object]]):
+        BENCHMARKS[setup.__name__] = (setup, sizes)
+        return setup
+
+    return register
+
+
+@benchmark(10, 50, 200)
+def planner_is_data_valid(tables: int) -> Callable[[], object]:
+    columns = 10
+    rows = (tables + columns - 1) // columns
+    width = columns * 120 + 40
+    height = rows * 120 + 40
+    planner = PlannerInfo(
+        precision=20,
+        tables=[
+            RestaurantTable(
+                real_id=str(i + 1),
+                left=40 + (i % columns) * 120,
+                top=40 + (i // columns) * 120,
+                width=60,
+                height=60,
+                seats_top=1,
+                seats_left=1,
+                seats_right=1,
+                seats_bottom=1,
+            )
+            for i in range(tables)
+        ],
+        borders=[
+            RestaurantBorder(
+                left=0,
+                top=0,
+                is_horizontal=True,
+                length=width,
+                type=RestaurantBorderType.wall,
+            ),
+            RestaurantBorder(
+                left=width,
+                top=20,
+                is_horizontal=False,
+                length=height - 20,
+                type=RestaurantBorderType.wall,
+            ),
+            RestaurantBorder(
+                left=0,
+                top=height,
+                is_horizontal=True,
+                length=width,
+                type=RestaurantBorderType.door,
+            ),
+            RestaurantBorder(
+                left=0,
+                top=20,
+                is_horizontal=False,
+                length=height - 20,
+                type=RestaurantBorderType.window,
+            ),
+        ],
+    )
+    return planner.isDataValid
+
+
+@benchmark(10, 100, 1000)
+def free_timeslots_for_day(reservations: int) -> Callable[[], object]:
+    rng = random.Random(reservations)
+    opening = datetime(2024, 1, 15, 10, 0)
+    dates = [
+        opening + timedelta(minutes=15 * rng.randint(0, 40))
+        for _ in range(reservations)
+    ]
+    return lambda: free_timeslots(
+        opening,
+        opening.replace(hour=22),
+        timedelta(hours=2),
+        dates,
+        max(reservations // 4, 1),
+    )
+
+
+@benchmark(100, 1000, 10000)
+def search_distance_filter(restaurants: int) -> Callable[[], object]:
+    rng = random.Random(restaurants)
+    rows = [
+        SimpleNamespace(
+            latitude=52.23 + rng.uniform(-0.2, 0.2),
+            longitude=21.01 + rng.uniform(-0.3, 0.3),
+        )
+        for _ in range(restaurants)
+    ]
+    return lambda: filter_by_distance(rows, 52.23, 21.01, 10)
+
+
+@benchmark(1)
+def update_restaurant_info_is_data_valid(_: int) -> Callable[[], object]:
+    def validate():
+        info = UpdateRestaurantInfo(
+            email="restauracja@example.com",
+            phone_number="+48500000000",
+            reservation_hour_length=2,
+            opening_hours={
+                day: RestaurantHour(
+                    open_time="10:00",
+                    close_time="22:00",
+                    temporary=False,
+                    closed=day == 6,
+                )
+                for day in range(7)
+            },
+            flags=[
+                RestaurantFlags(id=i, name=str(i), description="", setting=True)
+                for i in range(4, 0, -1)
+            ],
+        )
+        return info.isDataValid()
+
+    return validate
+
+
+@benchmark(8, 64, 1024)
+def validate_password_length(length: int) -> Callable[[], object]:
+    password = ("Aa1!" * length)[:length]
+    return lambda: validate_password(password)
+
+
+@benchmark(1)
+def compile_cached_queries(_: int) -> Callable[[], object]:
+    dialect = postgresql.psycopg2.dialect()
+    cache = LRUCache(500)
+    db = Session()
+    builders = [build for _, build in QUERIES.values()]
+
+    def compile_all():
+        for build in builders:
+            compile_statement(build(db, 1), dialect, cache)
+
+    # the first call fills the compiled cache; a builder that stops hitting it shows up
+    # as a several-fold slowdown
+    compile_all()
+    return compile_all
+
+
+def calibration_workload() -> int:
+    values = {}
+    for i in range(2000):
+        values[str(i)] = i * i % 7
+    return sum(x for x in values.values() if x > 2)
+
+
+def measure(function: Callable[[], object], repeat: int) -> dict[str, float]:
+    timer = Timer(function)
+    number, _ = timer.autorange()
+    calibration = Timer(calibration_workload)
+    calibration_number, _ = calibration.autorange()
+    timings = []
+    calibration_timings = []
+    # the calibration workload is timed next to every repeat, so a slower machine or a
+    # burst of background load shifts both numbers and cancels out in the ratio
+    for _ in range(repeat):
+        calibration_timings.append(
+            calibration.timeit(number=calibration_number) / calibration_number * 1e6
+        )
+        timings.append(timer.timeit(number=number) / number * 1e6)
+    return {
+        "min_us": min(timings),
+        "median_us": median(timings),
+        "relative": min(timings) / min(calibration_timings),
+    }
+
+
+def run(
+    selected: list[str] | None = None, repeat: int = 5
+) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, (setup, sizes) in BENCHMARKS.items():
+        if selected and name not in selected:
+            continue
+        for size in sizes:
+            results[f"{name}[{size}]"] = measure(setup(size), repeat)
+    return results
+
+
+def load_baseline(path: str) -> dict[str, dict[str, float]]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--benchmark", action="append", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the new baseline"
+    )
+    args = parser.parse_args()
+    results = run(args.benchmark, args.repeat)
+    baseline = load_baseline(args.baseline)
+    for name, result in results.items():
+        line = f"{name}: {result['median_us']:.2f} us (min {result['min_us']:.2f} us)"
+        if "relative" in baseline.get(name, {}):
+            change = result["relative"] / baseline[name]["relative"] - 1
+            line += f", {change:+.1%} vs baseline"
+        print(line)
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline | results, file, indent=2, sort_keys=True)
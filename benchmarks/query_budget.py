@@ -0,0 +1,118 @@
+import argparse
+from datetime import date, timedelta
+import sys
+
+from fastapi.testclient import TestClient
+
+from config import DBSession, getEnv
+from main import app
+from models.user import UserDB, UserType, WorkerDB
+from response_cache import response_cache
+from security.login import create_access_token
+
+# role, method, path, params, query budget
+ROUTES = [
+    ("user", "GET", "/api/users/restaurant-info", {"restaurant_id": "{restaurant_id}"}, 3),
+    ("user", "GET", "/api/users/restaurant-categories", {"restaurant_id": "{restaurant_id}"}, 3),
+    (
+        "user",
+        "GET",
+        "/api/users/restaurant-category-items",
+        {"restaurant_id": "{restaurant_id}", "category_id": "{category_id}"},
+        4,
+    ),
+    ("user", "GET", "/api/users/planner-info", {"restaurant_id": "{restaurant_id}"}, 4),
+    (
+        "user",
+        "GET",
+        "/api/users/get-date-available-times",
+        {"restaurant_id": "{restaurant_id}", "date": "{date}", "guests_amount": "2"},
+        6,
+    ),
+    ("user", "GET", "/api/users/current-reservations", {}, 2),
+    ("user", "GET", "/api/users/reservations-history", {}, 2),
+    ("worker", "GET", "/api/workers/planner-info", {}, 4),
+    ("worker", "GET", "/api/workers/todays-reservations", {}, 2),
+    ("worker", "GET", "/api/workers/tables-coming-reservations", {}, 2),
+    ("worker", "GET", "/api/workers/pending-reservations", {}, 2),
+    ("worker", "GET", "/api/workers/current-reservations", {}, 2),
+    ("owner", "GET", "/api/owners/restaurant-info", {}, 2),
+    ("owner", "GET", "/api/owners/planner-info", {}, 3),
+    ("owner", "GET", "/api/owners/restaurant-menu", {}, 3),
+]
+
+
+def access_token(email: str, type: UserType) -> str:
+    with DBSession() as db:
+        user = db.query(UserDB if type == UserType.user else WorkerDB).filter_by(email=email).first()
+        if user is None:
+            raise SystemExit(f"no {type.name} with e-mail {email}")
+        scopes = user.permissions if isinstance(user, WorkerDB) else ""
+    return create_access_token(
+        data={"sub": email, "scopes": scopes},
+        expires_delta=timedelta(minutes=getEnv().access_token_expire_minutes),
+    )
+
+
+def parse_server_timing(value: str) -> tuple[int, float]:
+    duration = float(value.split("dur=")[1].split(";")[0])
+    count = int(value.split('desc="')[1].split(" ")[0])
+    return count, duration
+
+
+def route_values(restaurant_id: int, category_id: int) -> dict[str, str]:
+    return {
+        "restaurant_id": str(restaurant_id),
+        "category_id": str(category_id),
+        "date": (date.today() + timedelta(days=1)).isoformat() + "T00:00:00",
+    }
+
+
+def run(emails: dict[str, str], values: dict[str, str]) -> list[dict]:
+    types = {"user": UserType.user, "worker": UserType.worker, "owner": UserType.owner}
+    tokens = {role: access_token(email, types[role]) for role, email in emails.items()}
+    results = []
+    with TestClient(app) as client:
+        for role, method, path, params, budget in ROUTES:
+            response_cache.clear()
+            response = client.request(
+                method,
+                path,
+                params={key: value.format(**values) for key, value in params.items()},
+                headers={"Authorization": f"Bearer {tokens[role]}"},
+            )
+            count, duration = parse_server_timing(response.headers["server-timing"])
+            results.append(
+                {
+                    "route": f"{method} {path}",
+                    "status": response.status_code,
+                    "queries": count,
+                    "db_ms": duration,
+                    "budget": budget,
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-email", required=True)
+    parser.add_argument("--worker-email", required=True)
+    parser.add_argument("--owner-email", required=True)
+    parser.add_argument("--restaurant-id", type=int, required=True)
+    parser.add_argument("--category-id", type=int, required=True)
+    args = parser.parse_args()
+    results = run(
+        {"user": args.user_email, "worker": args.worker_email, "owner": args.owner_email},
+        route_values(args.restaurant_id, args.category_id),
+    )
+    failed = False
+    for result in results:
+        exceeded = result["queries"] > result["budget"]
+        failed = failed or exceeded
+        print(
+            f"{'FAIL' if exceeded else 'ok  '} {result['route']}: "
+            f"{result['queries']}/{result['budget']} queries, {result['db_ms']:.1f} ms, "
+            f"status {result['status']}"
+        )
+    sys.exit(1 if failed else 0)
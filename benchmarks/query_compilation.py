@@ -0,0 +1,187 @@
+import argparse
+from datetime import datetime, timedelta
+from statistics import median
+from time import perf_counter
+from typing import Callable
+
+from sqlalchemy import Date, and_, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import concat
+from sqlalchemy.util import LRUCache
+
+from models.restaurant import RestaurantDB
+from models.menu import RestaurantMenuItemDB, RestaurantMenuItemType, _menu_user_items_stmt
+from models.reservation import (
+    ReservationDB,
+    ReservationStatus,
+    _pending_reservations_count_stmt,
+    _todays_reservations_stmt,
+    worker_reservation_columns,
+)
+from models.table import RestaurantTableDB, _free_tables_stmt
+from models.user import UserDB
+
+
+def pending_count_orm(db: Session, restaurant_id: int):
+    return (
+        db.query(ReservationDB.id)
+        .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
+        .filter(
+            RestaurantDB.id == restaurant_id,
+            ReservationDB.date
+            + func.cast(concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL)
+            >= datetime.now(),
+            ReservationDB.status == ReservationStatus.pending,
+        )
+        .statement.with_only_columns(func.count(ReservationDB.id))
+    )
+
+
+def todays_reservations_orm(db: Session, restaurant_id: int):
+    return (
+        db.query(*worker_reservation_columns())
+        .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
+        .outerjoin(RestaurantTableDB, RestaurantTableDB.id == ReservationDB.table)
+        .outerjoin(UserDB, UserDB.id == ReservationDB.user)
+        .filter(
+            RestaurantDB.id == restaurant_id,
+            ReservationDB.date
+            + func.cast(concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL)
+            >= datetime.now(),
+            func.cast(ReservationDB.date, Date) == datetime.now().date(),
+            ReservationDB.status == ReservationStatus.accepted,
+        )
+        .order_by(ReservationDB.date)
+        .statement
+    )
+
+
+def free_tables_orm(db: Session, restaurant_id: int):
+    date = datetime.now()
+    end_date = date + timedelta(hours=2)
+    return (
+        db.query(RestaurantTableDB)
+        .join(RestaurantDB, RestaurantTableDB.restaurant_id == RestaurantDB.id, isouter=True)
+        .join(
+            ReservationDB,
+            and_(
+                RestaurantTableDB.id == ReservationDB.table,
+                ReservationDB.date > date,
+                ReservationDB.date < end_date,
+                ReservationDB.status != ReservationStatus.rejected,
+            ),
+            isouter=True,
+        )
+        .filter(
+            RestaurantDB.id == restaurant_id,
+            RestaurantTableDB.seats_bottom
+            + RestaurantTableDB.seats_left
+            + RestaurantTableDB.seats_right
+            + RestaurantTableDB.seats_top
+            >= 2,
+            ReservationDB.id == None,
+        )
+        .statement
+    )
+
+
+def menu_items_orm(db: Session, category_id: int):
+    return (
+        db.query(
+            RestaurantMenuItemDB.id,
+            RestaurantMenuItemDB.name,
+            RestaurantMenuItemDB.description,
+            RestaurantMenuItemDB.price,
+            RestaurantMenuItemDB.order,
+            (RestaurantMenuItemDB.status == RestaurantMenuItemType.available).label(
+                "is_available"
+            ),
+            RestaurantMenuItemDB.photo_url,
+        )
+        .filter(
+            RestaurantMenuItemDB.category_id == category_id,
+            RestaurantMenuItemDB.status != RestaurantMenuItemType.inactive,
+        )
+        .statement
+    )
+
+
+# the lambda side calls the builders the app executes, so the numbers follow any change
+# to them; the orm side keeps the db.query chains they replaced for comparison
+def pending_count_lambda(db: Session, restaurant_id: int):
+    return _pending_reservations_count_stmt(restaurant_id, datetime.now())
+
+
+def todays_reservations_lambda(db: Session, restaurant_id: int):
+    return _todays_reservations_stmt(restaurant_id, datetime.now())
+
+
+def free_tables_lambda(db: Session, restaurant_id: int):
+    date = datetime.now()
+    return _free_tables_stmt(restaurant_id, date, date + timedelta(hours=2), 2)
+
+
+def menu_items_lambda(db: Session, category_id: int):
+    return _menu_user_items_stmt(category_id)
+
+
+QUERIES: dict[str, tuple[Callable, Callable]] = {
+    "pending_reservations_count": (pending_count_orm, pending_count_lambda),
+    "todays_reservations": (todays_reservations_orm, todays_reservations_lambda),
+    "free_tables_for_time": (free_tables_orm, free_tables_lambda),
+    "menu_user_items": (menu_items_orm, menu_items_lambda),
+}
+
+
+def compile_statement(statement, dialect, cache: LRUCache | None) -> bool:
+    # same compile step Connection.execute runs, so no database is needed
+    _, _, stats = statement._compile_w_cache(dialect, compiled_cache=cache, column_keys=[])
+    return stats == dialect.CACHE_HIT
+
+
+def per_call_us(build: Callable, count: int, cache: LRUCache | None) -> dict[str, float]:
+    dialect = postgresql.psycopg2.dialect()
+    db = Session()
+    timings = []
+    hits = 0
+    for i in range(count):
+        start = perf_counter()
+        cached = compile_statement(build(db, i % 50 + 1), dialect, cache)
+        timings.append(perf_counter() - start)
+        hits += cached
+    return {
+        "median_us": median(timings) * 1e6,
+        "min_us": min(timings) * 1e6,
+        "cache_hits": hits / count,
+    }
+
+
+def run(selected: list[str] | None, count: int, cached: bool) -> dict[str, dict]:
+    results = {}
+    for name, (orm, lambda_) in QUERIES.items():
+        if selected and name not in selected:
+            continue
+        results[name] = {
+            "orm": per_call_us(orm, count, LRUCache(500) if cached else None),
+            "lambda": per_call_us(lambda_, count, LRUCache(500) if cached else None),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--query", action="append", choices=list(QUERIES))
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="compile every call, as with query_cache_size=0"
+    )
+    args = parser.parse_args()
+    for name, result in run(args.query, args.count, not args.no_cache).items():
+        orm, lambda_ = result["orm"], result["lambda"]
+        print(
+            f"{name}: orm {orm['median_us']:.1f} us ({orm['cache_hits']:.0%} cached), "
+            f"lambda {lambda_['median_us']:.1f} us ({lambda_['cache_hits']:.0%} cached), "
+            f"{lambda_['median_us'] / orm['median_us'] - 1:+.1%}"
+        )
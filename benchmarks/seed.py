@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import json
+import random
+
+from config import DBSession
+from models.menu import RestaurantMenuCategoryDB, RestaurantMenuItemDB, RestaurantMenuItemType
+from models.reservation import ReservationDB, ReservationStatus
+from models.restaurant import RestaurantDB, RestaurantHour, update_restaurant_opening_hours
+from models.table import RestaurantBorderDB, RestaurantBorderType, RestaurantTableDB
+from models.user import AccountStatus, UserDB, UserType, WorkerDB
+from security.token import get_password_hash
+
+PASSWORD = "Obciazenie1!"
+# Warsaw city centre, restaurants are scattered within about 10 km
+CENTER = (52.2297, 21.0122)
+
+
+def seed_restaurant(
+    db, rng: random.Random, prefix: str, index: int, tables: int, hashed_password: str
+) -> dict:
+    restaurant = RestaurantDB(
+        name=f"{prefix} restauracja {index}",
+        nip=f"{prefix}-{index:08d}",
+        country="Polska",
+        city="Warszawa",
+        street_number=f"Testowa {index}",
+        postal_code="00-001",
+        latitude=CENTER[0] + rng.uniform(-0.09, 0.09),
+        longitude=CENTER[1] + rng.uniform(-0.14, 0.14),
+        email=f"{prefix}-restaurant-{index}@example.com",
+        phone_number="+48500000000",
+        plan_precision=20,
+        reservation_hour_length=2,
+        photo_url="",
+    )
+    db.add(restaurant)
+    db.flush()
+    columns = 8
+    db.add_all(
+        RestaurantTableDB(
+            restaurant_id=restaurant.id,
+            real_id=str(i + 1),
+            left=40 + (i % columns) * 120,
+            top=40 + (i // columns) * 120,
+            width=60,
+            height=60,
+            seats_top=rng.randint(0, 2),
+            seats_left=1,
+            seats_right=1,
+            seats_bottom=rng.randint(0, 2),
+        )
+        for i in range(tables)
+    )
+    rows = (tables + columns - 1) // columns
+    db.add_all(
+        [
+            RestaurantBorderDB(
+                restaurant_id=restaurant.id,
+                left=0,
+                top=0,
+                is_horizontal=True,
+                length=columns * 120 + 40,
+                type=RestaurantBorderType.wall,
+            ),
+            RestaurantBorderDB(
+                restaurant_id=restaurant.id,
+                left=0,
+                top=0,
+                is_horizontal=False,
+                length=rows * 120 + 40,
+                type=RestaurantBorderType.wall,
+            ),
+            RestaurantBorderDB(
+                restaurant_id=restaurant.id,
+                left=0,
+                top=rows * 120 + 40,
+                is_horizontal=True,
+                length=120,
+                type=RestaurantBorderType.door,
+            ),
+        ]
+    )
+    items = []
+    categories = []
+    for category_index in range(5):
+        category = RestaurantMenuCategoryDB(
+            restaurant_id=restaurant.id,
+            name=f"Kategoria {category_index + 1}",
+            order=category_index,
+            is_visible=True,
+        )
+        db.add(category)
+        db.flush()
+        categories.append(category.id)
+        for item_index in range(12):
+            item = RestaurantMenuItemDB(
+                category_id=category.id,
+                name=f"Pozycja {category_index + 1}.{item_index + 1}",
+                order=item_index,
+                description="Opis pozycji menu",
+                price=round(rng.uniform(8, 90), 2),
+                status=RestaurantMenuItemType.available,
+                photo_url="",
+            )
+            db.add(item)
+            items.append(item)
+    worker = WorkerDB(
+        email=f"{prefix}-worker-{index}@example.com",
+        first_name="Kelner",
+        surname=str(index),
+        hashed_password=hashed_password,
+        status=AccountStatus.active,
+        restaurant_id=restaurant.id,
+    )
+    owner = WorkerDB(
+        email=f"{prefix}-owner-{index}@example.com",
+        first_name="Właściciel",
+        surname=str(index),
+        hashed_password=hashed_password,
+        status=AccountStatus.active,
+        restaurant_id=restaurant.id,
+        permissions="worker:basic owner:basic",
+        user_type=UserType.owner,
+    )
+    db.add_all([worker, owner])
+    db.flush()
+    return {
+        "id": restaurant.id,
+        "latitude": restaurant.latitude,
+        "longitude": restaurant.longitude,
+        "categories": categories,
+        "items": [x.id for x in items],
+        "worker": worker.email,
+        "owner": owner.email,
+    }
+
+
+async def seed(
+    prefix: str, restaurants: int, tables: int, users: int, reservations: int, seed: int
+) -> dict:
+    rng = random.Random(seed)
+    hashed_password = get_password_hash(PASSWORD)
+    opening_hours = {
+        day: RestaurantHour(open_time="10:00", close_time="22:00", temporary=False, closed=False)
+        for day in range(7)
+    }
+    db = DBSession()
+    try:
+        if db.query(RestaurantDB.id).filter(RestaurantDB.nip.startswith(prefix + "-")).first():
+            raise SystemExit(f"data with prefix {prefix!r} is already seeded, pass another --prefix")
+        seeded = [
+            seed_restaurant(db, rng, prefix, i, tables, hashed_password)
+            for i in range(restaurants)
+        ]
+        user_rows = [
+            UserDB(
+                email=f"{prefix}-user-{i}@example.com",
+                first_name=f"Gość {i}",
+                hashed_password=hashed_password,
+                status=AccountStatus.active,
+            )
+            for i in range(users)
+        ]
+        db.add_all(user_rows)
+        db.flush()
+        table_ids = {
+            x["id"]: [
+                id
+                for (id,) in db.query(RestaurantTableDB.id).filter(
+                    RestaurantTableDB.restaurant_id == x["id"]
+                )
+            ]
+            for x in seeded
+        }
+        today = datetime.now().replace(minute=0, second=0, microsecond=0)
+        active = []
+        for i in range(reservations):
+            restaurant = rng.choice(seeded)
+            user = rng.choice(user_rows)
+            # a share of reservations is ongoing so that orders can be updated
+            ongoing = i % 10 == 0
+            date = (
+                datetime.now() - timedelta(minutes=30)
+                if ongoing
+                else today.replace(hour=rng.randint(10, 19)) + timedelta(days=rng.randint(-3, 7))
+            )
+            reservation = ReservationDB(
+                user=user.id,
+                restaurant_id=restaurant["id"],
+                table=rng.choice(table_ids[restaurant["id"]]),
+                date=date,
+                status=ReservationStatus.accepted
+                if ongoing
+                else rng.choice(list(ReservationStatus)),
+                guests_amount=rng.randint(1, 4),
+                order={},
+            )
+            db.add(reservation)
+            if ongoing:
+                active.append((reservation, user, restaurant))
+        db.flush()
+        manifest = {
+            "password": PASSWORD,
+            "restaurants": seeded,
+            "users": [x.email for x in user_rows],
+            "ongoing_reservations": [
+                {"id": reservation.id, "user": user.email, "restaurant_id": restaurant["id"]}
+                for reservation, user, restaurant in active
+            ],
+        }
+        db.commit()
+        for restaurant in seeded:
+            await update_restaurant_opening_hours(db, restaurant["id"], opening_hours)
+        return manifest
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prefix", default="load")
+    parser.add_argument("--restaurants", type=int, default=50)
+    parser.add_argument("--tables", type=int, default=24)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--reservations", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="benchmarks/seed.json")
+    args = parser.parse_args()
+    manifest = asyncio.run(
+        seed(args.prefix, args.restaurants, args.tables, args.users, args.reservations, args.seed)
+    )
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    print(
+        f"seeded {args.restaurants} restaurants, {args.users} users and "
+        f"{args.reservations} reservations into {args.output}"
+    )
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import tracemalloc
+
+from uploads import receive_upload
+
+
+class GeneratedUpload:
+    def __init__(self, size: int):
+        self.size = size
+        self.remaining = size
+
+    async def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = self.remaining
+        size = min(size, self.remaining)
+        self.remaining -= size
+        return b"\0" * size
+
+
+async def buffered(size: int) -> int:
+    return len(await GeneratedUpload(size).read())
+
+
+async def streamed(size: int) -> int:
+    async with receive_upload(GeneratedUpload(size), max_bytes=size) as upload:
+        return upload.size
+
+
+def peak_memory(coroutine) -> int:
+    tracemalloc.start()
+    asyncio.run(coroutine)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=int, default=20)
+    args = parser.parse_args()
+    size = args.megabytes * 1024 * 1024
+    print(f"buffered_peak_bytes: {peak_memory(buffered(size))}")
+    print(f"streamed_peak_bytes: {peak_memory(streamed(size))}")
@@ -0,0 +1,124 @@
+from contextvars import ContextVar
+import gzip
+from typing import Callable
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import getEnv
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+UNCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+response_encoding: ContextVar[str | None] = ContextVar("response_encoding", default=None)
+
+
+def supported_encodings() -> list[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=getEnv().compression_brotli_quality)
+    return gzip.compress(body, compresslevel=getEnv().compression_gzip_level, mtime=0)
+
+
+def should_compress(body: bytes) -> bool:
+    return len(body) >= getEnv().compression_min_bytes
+
+
+def no_compression(endpoint: Callable) -> Callable:
+    endpoint.compress_response = False
+    return endpoint
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        token = response_encoding.set(encoding)
+        try:
+            await self.app(scope, receive, CompressionResponder(scope, send, encoding).send)
+        finally:
+            response_encoding.reset(token)
+
+
+class CompressionResponder:
+    def __init__(self, scope: Scope, send: Send, encoding: str | None):
+        self.scope = scope
+        self.downstream = send
+        self.encoding = encoding
+        self.start: Message | None = None
+        self.passthrough = False
+
+    def route_allows_compression(self) -> bool:
+        endpoint = self.scope.get("endpoint")
+        return getattr(endpoint, "compress_response", True)
+
+    async def send(self, message: Message):
+        if self.passthrough:
+            await self.downstream(message)
+            return
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or content_type.startswith(UNCOMPRESSIBLE_TYPES)
+                or content_type.startswith("text/event-stream")
+                or not self.route_allows_compression()
+            ):
+                self.passthrough = True
+                await self.downstream(message)
+            else:
+                self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+        body = message.get("body", b"")
+        # streamed responses are sent as they are produced
+        if message.get("more_body", False):
+            self.passthrough = True
+            await self.downstream(self.start)
+            await self.downstream(message)
+            return
+        # the encoding depends on Accept-Encoding even when this client gets the plain body
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoding is None or not should_compress(body):
+            self.start["headers"] = headers.raw
+            await self.downstream(self.start)
+            await self.downstream(message)
+            return
+        body = compress(body, self.encoding)
+        headers["content-encoding"] = self.encoding
+        headers["content-length"] = str(len(body))
+        self.start["headers"] = headers.raw
+        await self.downstream(self.start)
+        await self.downstream({"type": "http.response.body", "body": body})
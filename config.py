@@ -2,9 +2,13 @@ from fastapi_mail import ConnectionConfig
 from pydantic_settings import BaseSettings
 from pydantic import EmailStr, PostgresDsn
 from functools import lru_cache
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from itertools import count
+from time import monotonic
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from metrics import InstrumentedQueuePool
 
 # CONFIG
 class Env(BaseSettings):
@@ -14,6 +18,42 @@ class Env(BaseSettings):
     sqlalchemy_database_url: PostgresDsn
     supabase_url: str
     supabase_key: str
+    storage_backend: str = "supabase"
+    storage_local_path: str = "storage"
+    storage_local_url: str = "http://localhost:8080/storage"
+    upload_max_bytes: int = 10 * 1024 * 1024
+    photo_gc_batch_size: int = 100
+    photo_gc_poll_seconds: float = 30
+    photo_gc_max_attempts: int = 10
+    photo_gc_backoff_seconds: float = 60
+    photo_gc_lease_seconds: float = 10 * 60
+    photo_gc_reconcile_interval_seconds: float = 24 * 60 * 60
+    photo_gc_min_age_seconds: float = 24 * 60 * 60
+    response_cache_seconds: float = 300
+    response_cache_max_entries: int = 2048
+    search_cache_seconds: float = 15
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    query_repeat_threshold: int = 5
+    loop_watchdog_enabled: bool = False
+    loop_watchdog_interval_seconds: float = 0.05
+    loop_watchdog_threshold_seconds: float = 0.1
+    slow_query_threshold_ms: float = 200
+    slow_query_buffer_size: int = 200
+    slow_query_explain_sample_rate: float = 0
+    admin_token: str | None = None
+    profiler_max_seconds: float = 60
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_use_lifo: bool = False
+    db_pool_warmup_connections: int = 0
+    db_statement_timeout_ms: int = 0
+    sqlalchemy_replica_urls: list[PostgresDsn] = []
+    read_your_writes_seconds: float = 5
     google_oauth_client: str
     google_oauth_secret: str
     mail_username: str
@@ -21,6 +61,12 @@ class Env(BaseSettings):
     mail_from: EmailStr
     mail_server: str
     mail_from_name :str
+    mail_port: int = 465
+    mail_outbox_batch_size: int = 20
+    mail_outbox_max_attempts: int = 5
+    mail_outbox_backoff_seconds: float = 30
+    mail_outbox_poll_seconds: float = 5
+    mail_smtp_idle_seconds: float = 60
 
     class Config:
         env_file = "envfile"
@@ -30,16 +76,103 @@ def getEnv():
     return Env()
 
 # DATABASE 
-DBEngine = create_engine(getEnv().sqlalchemy_database_url.unicode_string(),pool_pre_ping=True)
+def engine_options(env: Env) -> dict:
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": env.db_pool_size,
+        "max_overflow": env.db_max_overflow,
+        "pool_timeout": env.db_pool_timeout_seconds,
+        "pool_recycle": env.db_pool_recycle_seconds,
+        "pool_pre_ping": env.db_pool_pre_ping,
+        "pool_use_lifo": env.db_pool_use_lifo,
+    }
+    if env.db_statement_timeout_ms > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={env.db_statement_timeout_ms}"}
+    return options
+
+DBEngine = create_engine(getEnv().sqlalchemy_database_url.unicode_string(),**engine_options(getEnv()))
 DBSession = sessionmaker(autocommit = False, autoflush = False, bind = DBEngine)
 
+def warm_up_pool(engine, connections: int):
+    opened = []
+    try:
+        for _ in range(min(connections, engine.pool.size())):
+            opened.append(engine.connect())
+    finally:
+        for connection in opened:
+            connection.close()
+
 class Base(DeclarativeBase):
     pass
     def to_dict(self):
         return {field.name:getattr(self, field.name) for field in self.__table__.c}
 
-def get_db():
+# Recent writes are remembered per process, so read-your-writes only holds when a
+# client keeps hitting the same worker. Deployments with several workers or
+# instances and replicas configured need sticky sessions on the load balancer.
+class SessionRouter:
+    def __init__(self, primary: sessionmaker, replicas: list[sessionmaker], window: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.window = window
+        self.next_replica = count()
+        self.last_writes: dict[int, float] = {}
+
+    def record_write(self, writer: int):
+        now = monotonic()
+        if len(self.last_writes) > 10000:
+            self.last_writes = {
+                key: value for key, value in self.last_writes.items() if now - value < self.window
+            }
+        self.last_writes[writer] = now
+
+    def wrote_recently(self, writer: int) -> bool:
+        last_write = self.last_writes.get(writer)
+        return last_write is not None and monotonic() - last_write < self.window
+
+    def read_session(self, writer: int) -> Session:
+        # a client that has just written reads its own data from the primary
+        if len(self.replicas) == 0 or self.wrote_recently(writer):
+            return self.primary()
+        return self.replicas[next(self.next_replica) % len(self.replicas)]()
+
+
+ReplicaEngines = [
+    create_engine(url.unicode_string(),**engine_options(getEnv()))
+    for url in getEnv().sqlalchemy_replica_urls
+]
+ReplicaSessions = [
+    sessionmaker(autocommit = False, autoflush = False, bind = x) for x in ReplicaEngines
+]
+session_router = SessionRouter(DBSession, ReplicaSessions, getEnv().read_your_writes_seconds)
+
+def request_writer(request: Request) -> int:
+    return hash(request.headers.get("authorization") or (request.client.host if request.client else ""))
+
+@event.listens_for(DBSession, "after_flush")
+def mark_session_written(session, flush_context):
+    session.info["written"] = True
+
+@event.listens_for(DBSession, "do_orm_execute")
+def mark_bulk_statement_written(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["written"] = True
+
+@event.listens_for(DBSession, "after_commit")
+def record_session_write(session):
+    if session.info.pop("written", False) and "writer" in session.info:
+        session_router.record_write(session.info["writer"])
+
+def get_db(request: Request):
     db = DBSession()
+    db.info["writer"] = request_writer(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(request: Request):
+    db = session_router.read_session(request_writer(request))
     try:
         yield db
     finally:
@@ -50,7 +183,7 @@ def get_db():
 mail_conf = conf = ConnectionConfig(
     MAIL_USERNAME = getEnv().mail_username,
     MAIL_PASSWORD = getEnv().mail_password,
-    MAIL_PORT = 465,
+    MAIL_PORT = getEnv().mail_port,
     MAIL_SERVER = getEnv().mail_server,
     MAIL_FROM = getEnv().mail_from,
     MAIL_FROM_NAME = getEnv().mail_from_name,
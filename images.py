@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+VARIANTS = {"thumbnail": 160, "medium": 640, "full": 1600}
+VARIANT_EXTENSION = ".webp"
+WEBP_QUALITY = 80
+
+executor: ProcessPoolExecutor | None = None
+
+
+class ImageProcessingError(Exception):
+    pass
+
+
+def variant_path(path: str, variant: str) -> str:
+    if variant == "full":
+        return path + VARIANT_EXTENSION
+    return path + "_" + variant + VARIANT_EXTENSION
+
+
+def photo_variant_urls(photo_url: str | None) -> dict[str, str]:
+    if photo_url is None or not photo_url.endswith(VARIANT_EXTENSION):
+        return {variant: photo_url or "" for variant in VARIANTS}
+    base = photo_url[: -len(VARIANT_EXTENSION)]
+    return {variant: variant_path(base, variant) for variant in VARIANTS}
+
+
+def photo_variant_paths(path: str) -> list[str]:
+    if not path.endswith(VARIANT_EXTENSION):
+        return [path]
+    base = path[: -len(VARIANT_EXTENSION)]
+    return [variant_path(base, variant) for variant in VARIANTS]
+
+
+def photo_full_path(path: str) -> str:
+    for variant in VARIANTS:
+        suffix = "_" + variant + VARIANT_EXTENSION
+        if variant != "full" and path.endswith(suffix):
+            return path[: -len(suffix)] + VARIANT_EXTENSION
+    return path
+
+
+def process_image(source: str) -> dict[str, bytes]:
+    try:
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            variants = {}
+            for variant, size in VARIANTS.items():
+                resized = image.copy()
+                resized.thumbnail((size, size))
+                output = BytesIO()
+                resized.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+                variants[variant] = output.getvalue()
+            return variants
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageProcessingError(str(e))
+
+
+async def render_variants(source: Path) -> dict[str, bytes]:
+    global executor
+    if executor is None:
+        executor = ProcessPoolExecutor()
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, process_image, str(source)
+    )
+
+
+def shutdown_executor():
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import sys
+import threading
+from time import perf_counter
+import traceback
+from starlette.types import ASGIApp, Receive, Scope, Send
+from config import getEnv
+from metrics import Counter, Histogram, registry, route_name
+
+logger = logging.getLogger(__name__)
+
+event_loop_blocks = registry.register(
+    Counter("event_loop_blocks_total", "Event loop stalls above the threshold by route", ("route",))
+)
+event_loop_block_duration = registry.register(
+    Histogram(
+        "event_loop_block_seconds",
+        "Duration of event loop stalls above the threshold by route",
+        ("route",),
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    )
+)
+
+
+class LoopWatchdog:
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread_id: int | None = None
+        self.heartbeat_task: asyncio.Task | None = None
+        self.thread: threading.Thread | None = None
+        self.stopping = threading.Event()
+        self.last_beat = 0.0
+        self.active_scopes: dict[asyncio.Task, Scope] = {}
+
+    def start(self):
+        if not getEnv().loop_watchdog_enabled or self.thread is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = perf_counter()
+        self.heartbeat_task = self.loop.create_task(self.heartbeat())
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    async def stop(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.heartbeat_task.cancel()
+        try:
+            await self.heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self.thread.join()
+        self.thread = None
+        self.heartbeat_task = None
+
+    async def heartbeat(self):
+        while True:
+            self.last_beat = perf_counter()
+            await asyncio.sleep(getEnv().loop_watchdog_interval_seconds)
+
+    def blocking_route(self) -> str:
+        task = asyncio.current_task(self.loop)
+        scope = self.active_scopes.get(task)
+        return route_name(scope) if scope is not None else "background"
+
+    def watch(self):
+        interval = getEnv().loop_watchdog_interval_seconds
+        threshold = getEnv().loop_watchdog_threshold_seconds
+        stall: tuple[float, str, str] | None = None
+        while not self.stopping.wait(interval / 2):
+            last_beat = self.last_beat
+            late = perf_counter() - last_beat - interval
+            if stall is None and late > threshold:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+                stall = (last_beat, self.blocking_route(), stack)
+            elif stall is not None and last_beat != stall[0]:
+                self.report(stall[1], stall[2], last_beat - stall[0] - interval)
+                stall = None
+
+    def report(self, route: str, stack: str, duration: float):
+        event_loop_blocks.inc(route)
+        event_loop_block_duration.observe(duration, route)
+        logger.warning(
+            "Event loop blocked for %.3f s in %s\n%s", duration, route, stack
+        )
+
+
+loop_watchdog = LoopWatchdog()
+
+
+class LoopWatchdogMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        task = asyncio.current_task()
+        if scope["type"] != "http" or task is None:
+            await self.app(scope, receive, send)
+            return
+        loop_watchdog.active_scopes[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_watchdog.active_scopes.pop(task, None)
@@ -0,0 +1,56 @@
+from pathlib import Path
+from typing import Any, Iterable
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+TEMPLATES_DIR = Path(__file__).parent / "templates" / "mail"
+DEFAULT_LANGUAGE = "pl"
+
+
+def render_subject(template: Template, context: dict[str, Any]) -> str:
+    # subjects end up in a mail header, a line break in any value would start a new header
+    return " ".join(template.render(context).splitlines())
+
+
+class MailTemplates:
+    def __init__(self, directory: Path = TEMPLATES_DIR):
+        self.environment = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,
+        )
+        self.templates: dict[tuple[str, str], tuple[Template, Template]] = {}
+
+    def compile(self):
+        templates: dict[tuple[str, str], tuple[Template, Template]] = {}
+        for path in self.environment.list_templates(extensions=["html"]):
+            language, name = path[: -len(".html")].split("/", 1)
+            templates[(language, name)] = (
+                self.environment.get_template(path[: -len(".html")] + ".subject.txt"),
+                self.environment.get_template(path),
+            )
+        self.templates = templates
+
+    def get(self, name: str, language: str = DEFAULT_LANGUAGE) -> tuple[Template, Template]:
+        if not self.templates:
+            self.compile()
+        if (language, name) in self.templates:
+            return self.templates[(language, name)]
+        return self.templates[(DEFAULT_LANGUAGE, name)]
+
+    def render(
+        self, name: str, context: dict[str, Any], language: str = DEFAULT_LANGUAGE
+    ) -> tuple[str, str]:
+        subject, body = self.get(name, language)
+        return render_subject(subject, context), body.render(context)
+
+    def render_bulk(
+        self,
+        name: str,
+        contexts: Iterable[dict[str, Any]],
+        language: str = DEFAULT_LANGUAGE,
+    ) -> list[tuple[str, str]]:
+        subject, body = self.get(name, language)
+        return [(render_subject(subject, x), body.render(x)) for x in contexts]
+
+
+mail_templates = MailTemplates()
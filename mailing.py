@@ -1,65 +1,196 @@
-from fastapi_mail import FastMail, MessageSchema, MessageType
-from config import mail_conf
-from models.user import User, UserDB, WorkerDB
+import asyncio
+from email.message import EmailMessage
+from email.utils import formataddr
+import logging
+import aiosmtplib
+from sqlalchemy.orm import Session
+from config import DBSession, getEnv, mail_conf
+from models.outbox import (
+    OutboxDB,
+    claim_outbox_batch,
+    insert_outbox_message,
+    insert_outbox_messages,
+    mark_outbox_failed,
+    mark_outbox_sent,
+)
+from mail_templates import DEFAULT_LANGUAGE, mail_templates
+from models.user import AccountStatus, User, UserDB, WorkerDB, get_restaurant_workers
 from security.users import get_user_activation_link
 
 from security.workers import get_worker_activation_link
 
-async def send_activation_mail_to_worker(worker: WorkerDB):
-    token = get_worker_activation_link(worker)
-    html = f"""<h1>Cześć {worker.first_name},</h1>
-    <p>Właśnie założone zostało Twoje konto kelnera w aplikacji Restaura TOUR. By ustanowić swoje hasło do konta, ściągnij aplikację i w zakładce "Ustaw nowe hasło" użyj swojego e-maila i poniższego klucza:<br>
-    Klucz do ustanowienia nowego hasła: <strong>{token}</strong><br>
-    <br>
-    <p>W razie problemów skontaktuj się ze swoim pracodawcą<br>
-    <br>
-    Życzymy powodzenia i przyjemnej pracy!<br>
-    Zespół Restaura TOUR</p>"""
-
-    message = MessageSchema(
-        subject="Konto w aplikacji Restaura TOUR",
-        recipients=[worker.email],
-        body=html,
-        subtype=MessageType.html)
-
-    fm = FastMail(mail_conf)
-    await fm.send_message(message)
+logger = logging.getLogger(__name__)
+
+
+class MailOutboxWorker:
+    def __init__(self):
+        self.smtp: aiosmtplib.SMTP | None = None
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.last_used = 0.0
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.disconnect()
+
+    def notify(self):
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            try:
+                sent = await self.deliver_batch()
+            except Exception:
+                logger.exception("Mail outbox delivery failed")
+                sent = 0
+            if sent >= getEnv().mail_outbox_batch_size:
+                continue
+            if (
+                self.smtp is not None
+                and asyncio.get_running_loop().time() - self.last_used
+                > getEnv().mail_smtp_idle_seconds
+            ):
+                await self.disconnect()
+            try:
+                await asyncio.wait_for(
+                    self.wakeup.wait(), timeout=getEnv().mail_outbox_poll_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+    async def deliver_batch(self) -> int:
+        db = DBSession()
+        try:
+            delivered = 0
+            # one message per transaction, so a send is never repeated once committed
+            # and the row lock is held until its outcome is stored
+            while delivered < getEnv().mail_outbox_batch_size:
+                messages = claim_outbox_batch(db, 1)
+                if len(messages) == 0:
+                    break
+                await self.deliver(messages[0])
+                db.commit()
+                delivered += 1
+            return delivered
+        finally:
+            db.close()
+
+    async def deliver(self, message: OutboxDB):
+        try:
+            await self.send(message)
+        except Exception as e:
+            if isinstance(e, (aiosmtplib.SMTPException, OSError)):
+                await self.disconnect()
+            logger.warning("Mail outbox message %d failed: %s", message.id, e)
+            mark_outbox_failed(
+                message,
+                str(e),
+                getEnv().mail_outbox_max_attempts,
+                getEnv().mail_outbox_backoff_seconds,
+            )
+        else:
+            mark_outbox_sent(message)
+
+    async def connect(self) -> aiosmtplib.SMTP:
+        if self.smtp is None or not self.smtp.is_connected:
+            self.smtp = aiosmtplib.SMTP(
+                hostname=mail_conf.MAIL_SERVER,
+                port=mail_conf.MAIL_PORT,
+                use_tls=mail_conf.MAIL_SSL_TLS,
+                start_tls=mail_conf.MAIL_STARTTLS,
+                validate_certs=mail_conf.VALIDATE_CERTS,
+            )
+            await self.smtp.connect()
+            if mail_conf.USE_CREDENTIALS:
+                await self.smtp.login(
+                    mail_conf.MAIL_USERNAME, mail_conf.MAIL_PASSWORD.get_secret_value()
+                )
+        return self.smtp
+
+    async def disconnect(self):
+        if self.smtp is not None:
+            try:
+                if self.smtp.is_connected:
+                    await self.smtp.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                self.smtp.close()
+            self.smtp = None
+
+    async def send(self, message: OutboxDB):
+        email = EmailMessage()
+        email["From"] = formataddr((mail_conf.MAIL_FROM_NAME, mail_conf.MAIL_FROM))
+        email["To"] = ", ".join(message.recipients)
+        email["Subject"] = message.subject
+        email.set_content(message.body, subtype="html")
+        smtp = await self.connect()
+        await smtp.send_message(email)
+        self.last_used = asyncio.get_running_loop().time()
+
+
+mail_outbox = MailOutboxWorker()
+
+
+async def queue_mail(db: Session, recipients: list[str], subject: str, html: str):
+    await insert_outbox_message(db, recipients, subject, html)
+    mail_outbox.notify()
     return True
 
-async def send_password_reset_mail_to_worker(worker: WorkerDB):
+
+async def queue_template_mail(
+    db: Session, recipient: str, template: str, context: dict, language: str = DEFAULT_LANGUAGE
+):
+    subject, html = mail_templates.render(template, context, language)
+    return await queue_mail(db, [recipient], subject, html)
+
+
+async def send_activation_mail_to_worker(db: Session, worker: WorkerDB):
     token = get_worker_activation_link(worker)
-    html = f"""<h1>Cześć {worker.first_name},</h1>
-    <p>Właśnie otrzymaliśmy prośbę o zresetowanie hasła w aplikacji Restaura TOUR. By ustanowić nowe hasło do konta, w aplikacji Restaura TOUR w zakładce "Ustaw nowe hasło" użyj swojego e-maila i poniższego klucza:<br>
-    Klucz do ustanowienia nowego hasła: <strong>{token}</strong><br>
-    <br>
-    <p>W razie problemów skontaktuj się ze swoim pracodawcą<br>
-    <br>
-    Zespół Restaura TOUR</p>"""
-
-    message = MessageSchema(
-        subject="Zresetowanie hasła -  Restaura TOUR",
-        recipients=[worker.email],
-        body=html,
-        subtype=MessageType.html)
-
-    fm = FastMail(mail_conf)
-    await fm.send_message(message)
-    return True
+    return await queue_template_mail(
+        db, worker.email, "worker_activation", {"worker": worker, "token": token}
+    )
+
+async def send_password_reset_mail_to_worker(db: Session, worker: WorkerDB):
+    token = get_worker_activation_link(worker)
+    return await queue_template_mail(
+        db, worker.email, "worker_password_reset", {"worker": worker, "token": token}
+    )
 
-async def send_activation_link_mail_to_user(user: UserDB):
+async def send_activation_link_mail_to_user(db: Session, user: UserDB):
     token = get_user_activation_link(user)
-    html = f"""<h1>Cześć {user.first_name},</h1>
-    <p>Właśnie zarejestrowałeś swoje konto w Restaura TOUR. By je aktywować, kliknij w poniższy link: <br>
-    <strong><a href="https://sample-pjj3vhv3la-ew.a.run.app/api/users/activate?token={token}&email={user.email}">Link</a></strong><br>
-    <br>
-    Zespół Restaura TOUR</p>"""
-
-    message = MessageSchema(
-        subject="Aktywacja konta -  Restaura TOUR",
-        recipients=[user.email],
-        body=html,
-        subtype=MessageType.html)
-
-    fm = FastMail(mail_conf)
-    await fm.send_message(message)
-    return True
\ No newline at end of file
+    return await queue_template_mail(
+        db, user.email, "user_activation", {"user": user, "token": token}
+    )
+
+async def send_notice_to_restaurant_workers(db: Session, restaurant_id: int, message: str):
+    workers = await get_restaurant_workers(db=db, restaurant_id=restaurant_id)
+    workers = [x for x in workers if x.status == AccountStatus.active]
+    if len(workers) == 0:
+        return False
+    restaurant_name = workers[0].restaurant.name
+    rendered = mail_templates.render_bulk(
+        "restaurant_workers_notice",
+        (
+            {"worker": x, "message": message, "restaurant_name": restaurant_name}
+            for x in workers
+        ),
+    )
+    await insert_outbox_messages(
+        db,
+        [
+            ([worker.email], subject, html)
+            for worker, (subject, html) in zip(workers, rendered)
+        ],
+    )
+    mail_outbox.notify()
+    return True
@@ -1,17 +1,94 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
 from owners.routes import ownersRouter
 from workers.routes import workersRouter
 from users.routes import usersRouter
 from security.login import loginRouter
-from config import Base, DBEngine
+from admin.routes import adminRouter
+from security.admin import verify_admin_token
+from config import Base, DBEngine, getEnv, warm_up_pool
+from models.reference import load_reference_data
+from mailing import mail_outbox
+from mail_templates import mail_templates
+from images import shutdown_executor
+from photo_gc import photo_gc
+from compression import CompressionMiddleware, no_compression
+from query_stats import QueryStatsMiddleware
+from metrics import MetricsMiddleware, loop_lag_monitor, metricsRouter, observe_pool
+from loop_watchdog import LoopWatchdogMiddleware, loop_watchdog
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 origins = [
     "*",
 ]
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
+
+@app.on_event("startup")
+def startup_db_pool():
+    warm_up_pool(DBEngine, getEnv().db_pool_warmup_connections)
+
+
+@app.on_event("startup")
+def startup_reference_data():
+    load_reference_data()
+
+
+@app.on_event("startup")
+async def startup_mail_outbox():
+    mail_templates.compile()
+    mail_outbox.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_mail_outbox():
+    await mail_outbox.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_image_executor():
+    shutdown_executor()
+
+
+@app.on_event("startup")
+async def startup_photo_gc():
+    photo_gc.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_photo_gc():
+    await photo_gc.stop()
+
+
+@app.on_event("startup")
+async def startup_loop_lag_monitor():
+    loop_lag_monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_loop_lag_monitor():
+    await loop_lag_monitor.stop()
+
+
+@app.on_event("startup")
+async def startup_loop_watchdog():
+    loop_watchdog.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_loop_watchdog():
+    await loop_watchdog.stop()
+
+
+observe_pool(DBEngine)
+
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+if getEnv().loop_watchdog_enabled:
+    app.add_middleware(LoopWatchdogMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -24,4 +101,14 @@ app.add_middleware(
 app.include_router(ownersRouter)
 app.include_router(workersRouter)
 app.include_router(usersRouter)
-app.include_router(loginRouter)
\ No newline at end of file
+app.include_router(loginRouter)
+app.include_router(adminRouter)
+# same token as /api/admin, route names and pool numbers are not for the public
+app.include_router(metricsRouter, dependencies=[Depends(verify_admin_token)])
+
+if getEnv().storage_backend == "local":
+    app.mount(
+        "/storage",
+        no_compression(StaticFiles(directory=getEnv().storage_local_path, check_dir=False)),
+        name="storage",
+    )
\ No newline at end of file
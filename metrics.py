@@ -0,0 +1,282 @@
+from abc import ABC, abstractmethod
+import asyncio
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    labels = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+
+    @abstractmethod
+    def samples(self) -> list[str]: ...
+
+    def render(self) -> str:
+        return "\n".join(
+            [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+            + self.samples()
+        )
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, description, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{format_labels(self.labels, labels)} {format_value(value)}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        collect: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, description, labels)
+        self.collect = collect
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> list[str]:
+        if self.collect is not None:
+            self.values[()] = self.collect()
+        return super().samples()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = buckets
+        self.counts: dict[tuple[str, ...], list[int]] = {}
+        self.sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def samples(self) -> list[str]:
+        samples = []
+        for labels, counts in self.counts.items():
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                total += count
+                bucket = format_labels(self.labels, labels, f'le="{format_value(float(bound))}"')
+                samples.append(f"{self.name}_bucket{bucket} {total}")
+            samples.append(f"{self.name}_sum{format_labels(self.labels, labels)} {self.sums[labels]!r}")
+            samples.append(f"{self.name}_count{format_labels(self.labels, labels)} {total}")
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(x.render() for x in self.metrics.values()) + "\n"
+
+
+registry = Registry()
+
+http_requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "Requests currently being handled")
+)
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Request latency by route",
+        ("method", "route"),
+    )
+)
+http_responses = registry.register(
+    Counter("http_responses_total", "Responses by route and status", ("method", "route", "status"))
+)
+event_loop_lag = registry.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Delay of the event loop over the scheduled wake-up",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    )
+)
+db_pool_checkout_wait = registry.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a pooled connection",
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+    )
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_pool_checkout_wait.observe(perf_counter() - start)
+
+
+def observe_pool(engine: Engine):
+    registry.register(
+        Gauge("db_pool_size", "Configured pool size", collect=lambda: engine.pool.size())
+    )
+    registry.register(
+        Gauge(
+            "db_pool_checked_out",
+            "Connections currently in use",
+            collect=lambda: engine.pool.checkedout(),
+        )
+    )
+    registry.register(
+        Gauge(
+            "db_pool_checked_in",
+            "Idle connections kept in the pool",
+            collect=lambda: engine.pool.checkedin(),
+        )
+    )
+    registry.register(
+        Gauge(
+            "db_pool_overflow",
+            "Connections opened above the pool size",
+            collect=lambda: max(engine.pool.overflow(), 0),
+        )
+    )
+    checkouts = registry.register(Counter("db_pool_checkouts_total", "Pool checkouts"))
+    event.listen(engine, "checkout", lambda *args: checkouts.inc())
+    connects = registry.register(
+        Counter("db_pool_connects_total", "New database connections opened by the pool")
+    )
+    event.listen(engine, "connect", lambda *args: connects.inc())
+    invalidations = registry.register(
+        Counter("db_pool_invalidations_total", "Pooled connections discarded as broken or stale")
+    )
+    event.listen(engine, "invalidate", lambda *args: invalidations.inc())
+    event.listen(engine, "soft_invalidate", lambda *args: invalidations.inc())
+
+
+def route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = route_name(scope)
+            http_request_duration.observe(perf_counter() - start, scope["method"], route)
+            http_responses.inc(scope["method"], route, str(status))
+
+
+class EventLoopLagMonitor:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.task: asyncio.Task | None = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            event_loop_lag.observe(max(loop.time() - scheduled, 0))
+
+
+loop_lag_monitor = EventLoopLagMonitor()
+
+metricsRouter = APIRouter(tags=["metrics"])
+
+
+@metricsRouter.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 from fastapi import HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, computed_field
 from sqlalchemy import (
     ForeignKey,
     Integer,
@@ -12,11 +12,14 @@ from sqlalchemy import (
     Enum as SQLEnum,
     Time,
     Float,
+    lambda_stmt,
+    select,
 )
-from config import Base, getEnv
-from sqlalchemy.orm import relationship, mapped_column, Session
+from config import Base
+from sqlalchemy.orm import relationship, mapped_column, Session, selectinload
 from sqlalchemy import func
-from supabase import create_client, Client
+from images import photo_variant_urls
+from storage import release_photo
 
 from sqlalchemy.dialects.postgresql import INTERVAL
 from sqlalchemy.sql.functions import concat
@@ -30,6 +33,7 @@ class RestaurantMenuItemType(str, Enum):
 
 
 class RestaurantMenuItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     id: int
     name: str
     description: str
@@ -39,6 +43,7 @@ class RestaurantMenuItem(BaseModel):
     photo_url: Optional[str] = ""
 
 class RestaurantMenuItemUser(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     id: int
     name: str
     description: str
@@ -47,8 +52,14 @@ class RestaurantMenuItemUser(BaseModel):
     is_available: bool
     photo_url: Optional[str] = ""
 
+    @computed_field
+    @property
+    def photo_variants(self) -> dict[str, str]:
+        return photo_variant_urls(self.photo_url)
+
 
 class RestaurantMenuCategory(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     id: int
     name: str
     is_visible: bool
@@ -57,6 +68,7 @@ class RestaurantMenuCategory(BaseModel):
 
 
 class RestaurantMenuCategoryUser(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     id: int
     name: str
     order: int
@@ -115,6 +127,7 @@ async def get_restaurant_menu(
 ) -> list[RestaurantMenuCategoryDB]:
     return (
         db.query(RestaurantMenuCategoryDB)
+        .options(selectinload(RestaurantMenuCategoryDB.items))
         .filter(RestaurantMenuCategoryDB.restaurant_id == restaurant_id)
         .order_by(RestaurantMenuCategoryDB.order)
         .all()
@@ -124,30 +137,36 @@ async def get_restaurant_menu(
 async def get_restaurant_menu_visible_categories(
     db: Session, restaurant_id: int
 ) -> list[RestaurantMenuCategoryDB]:
-    return (
-        db.query(RestaurantMenuCategoryDB)
-        .filter(
-            RestaurantMenuCategoryDB.restaurant_id == restaurant_id,
-            RestaurantMenuCategoryDB.is_visible == True,
+    return db.scalars(
+        lambda_stmt(
+            lambda: select(RestaurantMenuCategoryDB)
+            .where(
+                RestaurantMenuCategoryDB.restaurant_id == restaurant_id,
+                RestaurantMenuCategoryDB.is_visible == True,
+            )
+            .order_by(RestaurantMenuCategoryDB.order)
         )
-        .order_by(RestaurantMenuCategoryDB.order)
-        .all()
-    )
-async def get_restaurant_menu_category_items(
+    ).all()
+async def get_restaurant_visible_category(
     db: Session, restaurant_id: int, category_id: int,
-) -> list[RestaurantMenuItemDB]:
-    category = (
-        db.query(RestaurantMenuCategoryDB)
-        .filter(
-            RestaurantMenuCategoryDB.restaurant_id == restaurant_id,
-            RestaurantMenuCategoryDB.is_visible == True,
-            RestaurantMenuCategoryDB.id == category_id
+) -> RestaurantMenuCategoryDB:
+    category = db.scalars(
+        lambda_stmt(
+            lambda: select(RestaurantMenuCategoryDB).where(
+                RestaurantMenuCategoryDB.restaurant_id == restaurant_id,
+                RestaurantMenuCategoryDB.is_visible == True,
+                RestaurantMenuCategoryDB.id == category_id,
+            )
         )
-        .first()
-    )
+    ).first()
     if category is None:
         raise HTTPException(400, "Brak kategorii")
-    
+    return category
+
+async def get_restaurant_menu_category_items(
+    db: Session, restaurant_id: int, category_id: int,
+) -> list[RestaurantMenuItemDB]:
+    await get_restaurant_visible_category(db, restaurant_id, category_id)
     return (
         db.query(RestaurantMenuItemDB)
         .filter(
@@ -157,6 +176,43 @@ async def get_restaurant_menu_category_items(
         .all()
     )
 
+def _menu_user_items_stmt(category_id: int):
+    return lambda_stmt(
+        lambda: select(
+            RestaurantMenuItemDB.id,
+            RestaurantMenuItemDB.name,
+            RestaurantMenuItemDB.description,
+            RestaurantMenuItemDB.price,
+            RestaurantMenuItemDB.order,
+            (RestaurantMenuItemDB.status == RestaurantMenuItemType.available).label(
+                "is_available"
+            ),
+            RestaurantMenuItemDB.photo_url,
+        ).where(
+            RestaurantMenuItemDB.category_id == category_id,
+            RestaurantMenuItemDB.status != RestaurantMenuItemType.inactive,
+        )
+    )
+
+async def get_restaurant_menu_user_items(
+    db: Session, restaurant_id: int, category_id: int
+) -> list[RestaurantMenuItemUser]:
+    await get_restaurant_visible_category(db, restaurant_id, category_id)
+    items = db.execute(_menu_user_items_stmt(category_id)).all()
+    return [RestaurantMenuItemUser.model_validate(x) for x in items]
+
+
+async def get_restaurant_menu_user(db: Session, restaurant_id: int) -> RestaurantMenuUser:
+    categories = await get_restaurant_menu_visible_categories(
+        db=db, restaurant_id=restaurant_id
+    )
+    return RestaurantMenuUser(
+        categories=[RestaurantMenuCategoryUser.model_validate(x) for x in categories],
+        items=await get_restaurant_menu_user_items(
+            db=db, restaurant_id=restaurant_id, category_id=categories[0].id
+        ),
+    )
+
 async def add_new_category(db: Session, restaurant_id: int):
     category_count = (
         db.query(RestaurantMenuCategoryDB)
@@ -193,10 +249,13 @@ async def delete_restaurant_category(
             .filter(RestaurantMenuItemDB.category_id == category_id)
             .all()
         )
+        photo_urls = [x.photo_url for x in items_to_remove if x.photo_url]
         for item in items_to_remove:
             db.delete(item)
         db.delete(category_to_remove)
         db.commit()
+        for photo_url in photo_urls:
+            await release_photo(db, photo_url)
         return True
     return False
 
@@ -336,12 +395,7 @@ async def update_menu_item(
     if oldItem is None or item.price < 0.10 or item.price > 9999.99:
         return False
     if oldItem.photo_url != item.photo_url and oldItem.photo_url is not None and oldItem.photo_url != "":
-        supabase: Client = create_client(
-            supabase_url=getEnv().supabase_url, supabase_key=getEnv().supabase_key
-        )
-        supabase.storage.from_("menuitemspictures").remove(
-            [oldItem.photo_url.split("menuitemspictures/")[1]]
-        )
+        await release_photo(db, oldItem.photo_url)
     oldItem.name = item.name
     oldItem.description = item.description
     oldItem.price = item.price
@@ -426,8 +480,11 @@ async def delete_restaurant_item(db: Session, restaurant_id: int, item_id) -> bo
         .first()
     )
     if item_to_remove is not None:
+        photo_url = item_to_remove.photo_url
         db.delete(item_to_remove)
         db.commit()
+        if photo_url:
+            await release_photo(db, photo_url)
         return True
     return False
 
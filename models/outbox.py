@@ -0,0 +1,100 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from enum import Enum
+from sqlalchemy import DateTime, Integer, String, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
+from config import Base
+from sqlalchemy.orm import mapped_column, Session
+
+
+class OutboxStatus(str, Enum):
+    pending = "Oczekująca"
+    sent = "Wysłana"
+    failed = "Nieudana"
+
+
+class OutboxDB(Base):
+    __tablename__ = "outbox"
+
+    id = mapped_column(Integer, primary_key=True, index=True)
+    recipients = mapped_column(JSONB, nullable=False)
+    subject = mapped_column(String, nullable=False)
+    body = mapped_column(String, nullable=False)
+    status = mapped_column(
+        SQLEnum(OutboxStatus), default=OutboxStatus.pending, nullable=False, index=True
+    )
+    attempts = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at = mapped_column(DateTime, nullable=False, default=datetime.now)
+    last_error = mapped_column(String, nullable=True)
+    created_at = mapped_column(DateTime, nullable=False, default=datetime.now)
+    sent_at = mapped_column(DateTime, nullable=True)
+
+
+async def insert_outbox_message(
+    db: Session, recipients: list[str], subject: str, body: str
+) -> OutboxDB:
+    message = OutboxDB(
+        recipients=recipients,
+        subject=subject,
+        body=body,
+        status=OutboxStatus.pending,
+        attempts=0,
+        next_attempt_at=datetime.now(),
+    )
+    db.add(message)
+    db.commit()
+    db.refresh(message)
+    return message
+
+
+async def insert_outbox_messages(
+    db: Session, messages: list[tuple[list[str], str, str]]
+) -> None:
+    now = datetime.now()
+    db.add_all(
+        [
+            OutboxDB(
+                recipients=recipients,
+                subject=subject,
+                body=body,
+                status=OutboxStatus.pending,
+                attempts=0,
+                next_attempt_at=now,
+            )
+            for recipients, subject, body in messages
+        ]
+    )
+    db.commit()
+
+
+def claim_outbox_batch(db: Session, limit: int) -> list[OutboxDB]:
+    return (
+        db.query(OutboxDB)
+        .filter(
+            OutboxDB.status == OutboxStatus.pending,
+            OutboxDB.next_attempt_at <= datetime.now(),
+        )
+        .order_by(OutboxDB.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def mark_outbox_sent(message: OutboxDB):
+    message.status = OutboxStatus.sent
+    message.sent_at = datetime.now()
+    message.last_error = None
+
+
+def mark_outbox_failed(
+    message: OutboxDB, error: str, max_attempts: int, backoff_seconds: float
+):
+    message.attempts = message.attempts + 1
+    message.last_error = error[:500]
+    if message.attempts >= max_attempts:
+        message.status = OutboxStatus.failed
+    else:
+        message.next_attempt_at = datetime.now() + timedelta(
+            seconds=backoff_seconds * 2 ** (message.attempts - 1)
+        )
@@ -0,0 +1,174 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, Integer, String, delete, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from config import Base
+from images import photo_full_path, photo_variant_paths
+from sqlalchemy.orm import mapped_column, Session
+
+
+class PhotoDB(Base):
+    __tablename__ = "photos"
+
+    id = mapped_column(Integer, primary_key=True, index=True)
+    path = mapped_column(String, nullable=False, unique=True)
+    digest = mapped_column(String, nullable=False)
+    ref_count = mapped_column(Integer, nullable=False, default=1)
+    created_at = mapped_column(DateTime, nullable=False, default=datetime.now)
+    stored_at = mapped_column(DateTime, nullable=True)
+
+
+class PhotoDeletionDB(Base):
+    __tablename__ = "photo_deletions"
+
+    id = mapped_column(Integer, primary_key=True, index=True)
+    path = mapped_column(String, nullable=False, unique=True)
+    attempts = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at = mapped_column(DateTime, nullable=False, default=datetime.now)
+    last_error = mapped_column(String, nullable=True)
+    leased_until = mapped_column(DateTime, nullable=True)
+    created_at = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+
+def claim_photo(db: Session, path: str, digest: str) -> bool:
+    # one statement, so concurrent uploads of the same photo agree on its reference count;
+    # the objects only count as present once an upload of them has finished
+    stored = db.execute(
+        insert(PhotoDB)
+        .values(path=path, digest=digest, ref_count=1, created_at=datetime.now())
+        .on_conflict_do_update(
+            index_elements=[PhotoDB.path],
+            set_={"ref_count": PhotoDB.ref_count + 1},
+        )
+        .returning(PhotoDB.stored_at.is_not(None))
+    ).scalar_one()
+    db.commit()
+    return stored
+
+
+def cancel_photo_deletions(db: Session, path: str) -> bool:
+    # pending deletions of these paths would remove the objects about to be uploaded;
+    # ones the collector has leased are already being removed and are left to it
+    paths = photo_variant_paths(path)
+    now = datetime.now()
+    db.execute(
+        delete(PhotoDeletionDB).where(
+            PhotoDeletionDB.path.in_(paths),
+            or_(PhotoDeletionDB.leased_until == None, PhotoDeletionDB.leased_until <= now),
+        )
+    )
+    removing = db.query(PhotoDeletionDB.id).filter(PhotoDeletionDB.path.in_(paths)).first()
+    db.commit()
+    return removing is None
+
+
+def mark_photo_stored(db: Session, path: str):
+    db.execute(
+        update(PhotoDB)
+        .where(PhotoDB.path == path, PhotoDB.stored_at == None)
+        .values(stored_at=datetime.now())
+    )
+    db.commit()
+
+
+def release_photo_reference(db: Session, path: str) -> bool:
+    result = db.execute(
+        update(PhotoDB)
+        .where(PhotoDB.path == path)
+        .values(ref_count=PhotoDB.ref_count - 1)
+        .returning(PhotoDB.ref_count)
+    ).first()
+    if result is None:
+        db.commit()
+        return True
+    if result[0] <= 0:
+        db.execute(delete(PhotoDB).where(PhotoDB.path == path, PhotoDB.ref_count <= 0))
+        db.commit()
+        return True
+    db.commit()
+    return False
+
+
+def queue_photo_deletions(db: Session, paths: list[str]):
+    if len(paths) == 0:
+        return
+    now = datetime.now()
+    db.execute(
+        insert(PhotoDeletionDB)
+        .values(
+            [
+                {"path": path, "attempts": 0, "next_attempt_at": now, "created_at": now}
+                for path in paths
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=[PhotoDeletionDB.path])
+    )
+    db.commit()
+
+
+def photo_paths_in_use(db: Session, paths: list[str]) -> set[str]:
+    full_paths = {x: photo_full_path(x) for x in paths}
+    stored = {
+        x
+        for x, in db.query(PhotoDB.path).filter(PhotoDB.path.in_(set(full_paths.values())))
+    }
+    return {x for x, full_path in full_paths.items() if full_path in stored}
+
+
+def lease_photo_deletions(
+    db: Session, limit: int, lease_seconds: float
+) -> tuple[int, list[str]]:
+    now = datetime.now()
+    deletions = (
+        db.query(PhotoDeletionDB)
+        .filter(PhotoDeletionDB.next_attempt_at <= now)
+        .order_by(PhotoDeletionDB.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    # the photo may have been uploaded again since it was queued
+    in_use = photo_paths_in_use(db, [x.path for x in deletions])
+    leased = []
+    for deletion in deletions:
+        if deletion.path in in_use:
+            db.delete(deletion)
+            continue
+        # the lease is committed before the objects are removed, so no row lock is held
+        # meanwhile; if the collector dies the row becomes due again when it runs out
+        deletion.leased_until = now + timedelta(seconds=lease_seconds)
+        deletion.next_attempt_at = deletion.leased_until
+        leased.append(deletion.path)
+    db.commit()
+    return len(deletions), leased
+
+
+def finish_photo_deletions(db: Session, paths: list[str]):
+    db.execute(delete(PhotoDeletionDB).where(PhotoDeletionDB.path.in_(paths)))
+    db.commit()
+
+
+def mark_photo_deletions_failed(
+    db: Session,
+    paths: list[str],
+    error: str,
+    max_attempts: int,
+    backoff_seconds: float,
+):
+    deletions = (
+        db.query(PhotoDeletionDB)
+        .filter(PhotoDeletionDB.path.in_(paths))
+        .with_for_update()
+        .all()
+    )
+    for deletion in deletions:
+        deletion.attempts = deletion.attempts + 1
+        deletion.last_error = error[:500]
+        deletion.leased_until = None
+        if deletion.attempts >= max_attempts:
+            db.delete(deletion)
+        else:
+            deletion.next_attempt_at = datetime.now() + timedelta(
+                seconds=backoff_seconds * 2 ** (deletion.attempts - 1)
+            )
+    db.commit()
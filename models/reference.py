@@ -0,0 +1,38 @@
+from __future__ import annotations
+from typing import Any, Callable
+from sqlalchemy.orm import Session
+from config import DBSession
+
+
+# Loaded once per process at startup. The catalogues only change through migrations,
+# and every process has its own copy, so a change takes effect after a restart;
+# refresh() is there for code that changes a catalogue within the same process.
+class ReferenceDataCache:
+    def __init__(self):
+        self.loaders: dict[str, Callable[[Session], Any]] = {}
+        self.data: dict[str, Any] = {}
+
+    def register(self, name: str, loader: Callable[[Session], Any]):
+        self.loaders[name] = loader
+        self.data.pop(name, None)
+
+    def refresh(self, db: Session, name: str | None = None):
+        names = self.loaders.keys() if name is None else [name]
+        for key in names:
+            self.data[key] = self.loaders[key](db)
+
+    def get(self, db: Session, name: str) -> Any:
+        if name not in self.data:
+            self.refresh(db, name)
+        return self.data[name]
+
+
+reference_data = ReferenceDataCache()
+
+
+def load_reference_data():
+    db = DBSession()
+    try:
+        reference_data.refresh(db)
+    finally:
+        db.close()
@@ -2,7 +2,7 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from enum import Enum
 from fastapi import HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from sqlalchemy import (
     Boolean,
     Date,
@@ -11,7 +11,10 @@ from sqlalchemy import (
     Integer,
     Enum as SQLEnum,
     String,
+    and_,
     desc,
+    lambda_stmt,
+    select,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from config import Base, getEnv
@@ -20,10 +23,6 @@ from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import INTERVAL
 from sqlalchemy.sql.functions import concat
 
-from models.user import Worker
-
-
-
 
 class ReservationStatus(str, Enum):
     pending = "Oczekująca"
@@ -39,6 +38,7 @@ class AddReservation(BaseModel):
 
 
 class Reservation(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     id: int
     restaurant_id: int
     name: str
@@ -75,6 +75,27 @@ class ReservationDB(Base):
     table_obj = relationship("RestaurantTableDB",foreign_keys=[table], back_populates="reservations")
 
 
+def user_reservation_columns() -> list:
+    return [
+        *ReservationDB.__table__.c,
+        RestaurantDB.name.label("name"),
+        RestaurantDB.reservation_hour_length,
+    ]
+
+
+def worker_reservation_columns() -> list:
+    return [
+        *ReservationDB.__table__.c,
+        concat(
+            func.coalesce(UserDB.first_name, "Kelner"),
+            " - Stolik ",
+            RestaurantTableDB.real_id,
+        ).label("name"),
+        RestaurantDB.reservation_hour_length,
+        RestaurantTableDB.real_id.label("table_id"),
+    ]
+
+
 async def create_reservation(db: Session, data: AddReservation, user_id: int):
     new_reservation = ReservationDB(
         restaurant_id=data.restaurant_id,
@@ -220,55 +241,49 @@ async def get_reservation(db: Session, reservation_id: int, user_id: int | None)
 
 
 async def get_current_user_reservations(db: Session, user_id: int) -> list[Reservation]:
-    reservationsDB = (
-        db.query(ReservationDB)
-        .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
-        .filter(ReservationDB.user == user_id)
-        .filter(
-            ReservationDB.date
-            + func.cast(
-                concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
+    now = datetime.now()
+    reservationsDB = db.execute(
+        lambda_stmt(
+            lambda: select(*user_reservation_columns())
+            .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
+            .where(
+                ReservationDB.user == user_id,
+                ReservationDB.date
+                + func.cast(
+                    concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
+                )
+                >= now,
             )
-            >= datetime.now()
+            .order_by(ReservationDB.date)
         )
-        .order_by(ReservationDB.date)
-        .all()
-    )
-    return [
-        Reservation(
-            **x.to_dict(),
-            name=x.restaurant.name,
-            reservation_hour_length=x.restaurant.reservation_hour_length,
-        )
-        for x in reservationsDB
-    ]
+    ).all()
+    return [Reservation.model_validate(x) for x in reservationsDB]
 
-async def get_restaurant_todays_reservations(db: Session, restaurant_id: int) -> list[Reservation]:
-    reservationsDB = (
-        db.query(ReservationDB)
+def _todays_reservations_stmt(restaurant_id: int, now: datetime):
+    today = now.date()
+    return lambda_stmt(
+        lambda: select(*worker_reservation_columns())
         .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
-        .filter(
+        .outerjoin(RestaurantTableDB, RestaurantTableDB.id == ReservationDB.table)
+        .outerjoin(UserDB, UserDB.id == ReservationDB.user)
+        .where(
             RestaurantDB.id == restaurant_id,
             ReservationDB.date
             + func.cast(
                 concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
             )
-            >= datetime.now(),
-            func.cast(ReservationDB.date, Date) == datetime.now().date(),
+            >= now,
+            func.cast(ReservationDB.date, Date) == today,
             ReservationDB.status == ReservationStatus.accepted
         )
         .order_by(ReservationDB.date)
-        .all()
     )
-    return [
-        Reservation(
-            **x.to_dict(),
-            name=('Kelner' if x.user_obj is None else x.user_obj.first_name) + " - Stolik " + x.table_obj.real_id,
-            reservation_hour_length=x.restaurant.reservation_hour_length,
-            table_id = x.table_obj.real_id
-        )
-        for x in reservationsDB
-    ]
+
+async def get_restaurant_todays_reservations(db: Session, restaurant_id: int) -> list[Reservation]:
+    reservationsDB = db.execute(
+        _todays_reservations_stmt(restaurant_id, datetime.now())
+    ).all()
+    return [Reservation.model_validate(x) for x in reservationsDB]
 
 async def get_restaurant_table_coming_reservations_count(db: Session, restaurant_id: int, table_real_id: str) -> dict[int,int]:
     end_date = datetime.now() + timedelta(days=6)
@@ -300,7 +315,49 @@ async def get_restaurant_table_coming_reservations_count(db: Session, restaurant
     for day in opened_days_of_week:
         if day[0] not in count_dict:
             count_dict[day[0]]=0
-    # ordering
+    return order_days_from_today(count_dict)
+
+async def get_restaurant_tables_coming_reservations_count(db: Session, restaurant_id: int) -> dict[str, dict[int,int]]:
+    now = datetime.now()
+    end_date = now + timedelta(days=6)
+    # every table is paired with every open day and the reservations are outer joined,
+    # so one grouped query also yields the zero counts and tables without reservations
+    day_of_week_counts = (
+        db.query(RestaurantTableDB.real_id, RestaurantHoursDB.day_of_week, func.count(ReservationDB.id))
+        .join(RestaurantDB, RestaurantDB.id == RestaurantTableDB.restaurant_id)
+        .outerjoin(
+            RestaurantHoursDB,
+            and_(
+                RestaurantHoursDB.restaurant_id == RestaurantDB.id,
+                RestaurantHoursDB.closed == False,
+            ),
+        )
+        .outerjoin(
+            ReservationDB,
+            and_(
+                ReservationDB.table == RestaurantTableDB.id,
+                ReservationDB.status == ReservationStatus.accepted,
+                func.extract('DOW',ReservationDB.date) == RestaurantHoursDB.day_of_week,
+                ReservationDB.date
+                + func.cast(
+                    concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
+                )
+                >= now,
+                func.cast(ReservationDB.date, Date) <= end_date,
+            ),
+        )
+        .filter(RestaurantTableDB.restaurant_id == restaurant_id)
+        .group_by(RestaurantTableDB.real_id, RestaurantHoursDB.day_of_week)
+        .all()
+    )
+    counts: dict[str, dict[int,int]] = {}
+    for real_id, day, count in day_of_week_counts:
+        counts.setdefault(real_id, {})
+        if day is not None:
+            counts[real_id][day] = count
+    return {real_id: order_days_from_today(days) for real_id, days in counts.items()}
+
+def order_days_from_today(count_dict: dict[int,int]) -> dict[int,int]:
     today_weekday = datetime.today().weekday()
     i = 0
     return_dict: dict[int, int] = {}
@@ -312,37 +369,35 @@ async def get_restaurant_table_coming_reservations_count(db: Session, restaurant
     return return_dict
 
 async def get_restaurant_pending_reservations(db: Session, restaurant_id: int) -> list[Reservation]:
-    reservationsDB = (
-        db.query(ReservationDB)
-        .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
-        .filter(
-            RestaurantDB.id == restaurant_id,
-            ReservationDB.date + func.cast(
-                concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
+    now = datetime.now()
+    reservationsDB = db.execute(
+        lambda_stmt(
+            lambda: select(*worker_reservation_columns())
+            .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
+            .outerjoin(RestaurantTableDB, RestaurantTableDB.id == ReservationDB.table)
+            .outerjoin(UserDB, UserDB.id == ReservationDB.user)
+            .where(
+                RestaurantDB.id == restaurant_id,
+                ReservationDB.date + func.cast(
+                    concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
+                )
+                >= now,
+                ReservationDB.status == ReservationStatus.pending
             )
-            >= datetime.now(),
-            ReservationDB.status == ReservationStatus.pending
+            .order_by(ReservationDB.date)
         )
-        .order_by(ReservationDB.date)
-        .all()
-    )
-    return [
-        Reservation(
-            **x.to_dict(),
-            name=x.user_obj.first_name + " - Stolik " + x.table_obj.real_id,
-            reservation_hour_length=x.restaurant.reservation_hour_length,
-            table_id = x.table_obj.real_id
-        )
-        for x in reservationsDB
-    ]
+    ).all()
+    return [Reservation.model_validate(x) for x in reservationsDB]
 
 async def get_restaurant_current_reservations(db: Session, restaurant_id: int, page: int = 1, limit_per_page: int = 12) -> list[Reservation]:
     page_start = (page - 1) * limit_per_page
     page_end = page_start + limit_per_page
     end_date = datetime.now().date() + timedelta(days=6)
     reservationsDB = (
-        db.query(ReservationDB)
+        db.query(*worker_reservation_columns())
         .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
+        .outerjoin(RestaurantTableDB, RestaurantTableDB.id == ReservationDB.table)
+        .outerjoin(UserDB, UserDB.id == ReservationDB.user)
         .filter(
             RestaurantDB.id == restaurant_id,
             ReservationDB.date + func.cast(
@@ -357,49 +412,46 @@ async def get_restaurant_current_reservations(db: Session, restaurant_id: int, p
         .slice(page_start, page_end)
         .all()
     )
-    print(reservationsDB[0].id)
-    return [
-        Reservation(
-            **x.to_dict(),
-            name=('Kelner' if x.user_obj is None else x.user_obj.first_name) + " - Stolik " + x.table_obj.real_id,
-            reservation_hour_length=x.restaurant.reservation_hour_length,
-            table_id = x.table_obj.real_id
-        )
-        for x in reservationsDB
-    ]
+    return [Reservation.model_validate(x) for x in reservationsDB]
 
-async def get_restaurant_pending_reservations_count(db: Session, restaurant_id: int) -> int:
-    return (
-        db.query(ReservationDB.id)
+def _pending_reservations_count_stmt(restaurant_id: int, now: datetime):
+    return lambda_stmt(
+        lambda: select(func.count(ReservationDB.id))
         .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
-        .filter(
+        .where(
             RestaurantDB.id == restaurant_id,
             ReservationDB.date
             + func.cast(
                 concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
             )
-            >= datetime.now(),
+            >= now,
             ReservationDB.status == ReservationStatus.pending
         )
-        .count()
+    )
+
+async def get_restaurant_pending_reservations_count(db: Session, restaurant_id: int) -> int:
+    return db.scalar(
+        _pending_reservations_count_stmt(restaurant_id, datetime.now())
     )
 
 async def get_restaurant_needing_service_reservations_count(db: Session, restaurant_id: int) -> int:
-    return (
-        db.query(ReservationDB.id)
-        .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
-        .filter(
-            RestaurantDB.id == restaurant_id,
-            ReservationDB.date
-            + func.cast(
-                concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
+    now = datetime.now()
+    return db.scalar(
+        lambda_stmt(
+            lambda: select(func.count(ReservationDB.id))
+            .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
+            .where(
+                RestaurantDB.id == restaurant_id,
+                ReservationDB.date
+                + func.cast(
+                    concat(RestaurantDB.reservation_hour_length, " HOURS"), INTERVAL
+                )
+                >= now,
+                ReservationDB.date < now,
+                ReservationDB.status == ReservationStatus.accepted,
+                ReservationDB.need_service == True
             )
-            >= datetime.now(),
-            ReservationDB.date < datetime.now(),
-            ReservationDB.status == ReservationStatus.accepted,
-            ReservationDB.need_service == True
         )
-        .count()
     )
 
 
@@ -457,7 +509,7 @@ async def get_current_user_reservations_history(
     page_start = (page - 1) * limit_per_page
     page_end = page_start + limit_per_page
     reservationsDB = (
-        db.query(ReservationDB)
+        db.query(*user_reservation_columns())
         .join(RestaurantDB, RestaurantDB.id == ReservationDB.restaurant_id)
         .filter(ReservationDB.user == user_id)
         .filter(
@@ -471,14 +523,7 @@ async def get_current_user_reservations_history(
         .slice(page_start, page_end)
         .all()
     )
-    return [
-        Reservation(
-            **x.to_dict(),
-            name=x.restaurant.name,
-            reservation_hour_length=x.restaurant.reservation_hour_length,
-        )
-        for x in reservationsDB
-    ]
+    return [Reservation.model_validate(x) for x in reservationsDB]
 
 async def update_reservation_additional_details(db: Session, user_id: int, reservation_id: int, new_details: str) -> bool:
     reservation = (
@@ -512,4 +557,5 @@ from models.menu import (
     RestaurantMenuItemType,
 )
 from models.restaurant import RestaurantDB, RestaurantHoursDB
-from models.table import RestaurantTableDB
\ No newline at end of file
+from models.table import RestaurantTableDB
+from models.user import UserDB, Worker
@@ -1,19 +1,96 @@
 from __future__ import annotations
 import datetime
+from enum import IntFlag
+from typing import Iterable
 from email_validator import EmailNotValidError
-from pydantic import BaseModel, EmailStr, validate_email
-from sqlalchemy import Float, ForeignKey, Integer, String, Boolean, Time
+from pydantic import BaseModel, ConfigDict, EmailStr, computed_field, validate_email
+from sqlalchemy import Float, ForeignKey, Integer, String, Boolean, Time, event, func, insert, literal, select, text, true
+from sqlalchemy.dialects.postgresql import BIT
 from config import Base
-from sqlalchemy.orm import relationship, mapped_column, Session
+from sqlalchemy.orm import relationship, mapped_column, Session, joinedload
 from mpu import haversine_distance
+from images import photo_variant_urls
+from models.reference import reference_data
+import math
 import re
 
 
+class RestaurantFlag(IntFlag):
+    plan_preview = 1 << 0
+    occupancy_preview = 1 << 1
+    table_status_preview = 1 << 2
+    reservations = 1 << 3
+
+
+def flag_bit(db: Session, flag_id: int) -> int:
+    return 1 << reference_data.get(db, "restaurant_flag_bits")[flag_id]
+
+
+def reservations_enabled():
+    return RestaurantDB.flags_mask.op("&")(int(RestaurantFlag.reservations)) != 0
+
+
+SLOTS_PER_DAY = 96
+OPENING_HOURS_BITS = 7 * SLOTS_PER_DAY
+EMPTY_OPENING_HOURS = "0" * OPENING_HOURS_BITS
+OpeningHoursBitmap = BIT(OPENING_HOURS_BITS)
+
+
+def time_to_slot(value: datetime.time | str, round_up: bool = False) -> int:
+    if isinstance(value, str):
+        value = datetime.time.fromisoformat(value)
+    slot = value.hour * 4 + value.minute // 15
+    if round_up and (value.minute % 15 or value.second or value.microsecond):
+        slot += 1
+    return slot
+
+
+def reservation_slots(reservation_hour_length: float) -> int:
+    return math.ceil(reservation_hour_length * 4)
+
+
+def slots_bitmap(slots: dict[int, tuple[int, int]]) -> str:
+    bits = list(EMPTY_OPENING_HOURS)
+    for day, (start, end) in slots.items():
+        for slot in range(max(start, 0), min(end, SLOTS_PER_DAY)):
+            bits[day * SLOTS_PER_DAY + slot] = "1"
+    return "".join(bits)
+
+
+def bitmap_and(first: str, second: str) -> str:
+    return format(int(first, 2) & int(second, 2), "0" + str(OPENING_HOURS_BITS) + "b")
+
+
+def day_slots_count(bitmap: str, day: int) -> int:
+    return bitmap.count("1", day * SLOTS_PER_DAY, (day + 1) * SLOTS_PER_DAY)
+
+
+def closing_slot(value: datetime.time | str) -> int:
+    # closing at midnight means open until the end of the day
+    return time_to_slot(value) or SLOTS_PER_DAY
+
+
+def opening_hours_bitmap(opening_hours: dict[int, RestaurantHour]) -> str:
+    return slots_bitmap(
+        {
+            day: (time_to_slot(hour.open_time, round_up=True), closing_slot(hour.close_time))
+            for day, hour in opening_hours.items()
+            if not hour.closed and hour.open_time != "" and hour.close_time != ""
+        }
+    )
+
+
 class RestaurantBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     id: int
     name: str
     photo_url: str
 
+    @computed_field
+    @property
+    def photo_variants(self) -> dict[str, str]:
+        return photo_variant_urls(self.photo_url)
+
 
 class RestaurantSearch(BaseModel):
     search_name: str
@@ -151,6 +228,13 @@ class RestaurantDB(Base):
     plan_precision = mapped_column(Integer, nullable=True)
     reservation_hour_length = mapped_column(Float)
     photo_url = mapped_column(String)
+    flags_mask = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    cache_version = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    opening_hours_mask = mapped_column(
+        OpeningHoursBitmap,
+        nullable=False,
+        server_default=text("repeat('0', %d)::bit(%d)" % (OPENING_HOURS_BITS, OPENING_HOURS_BITS)),
+    )
 
     flags = relationship("RestaurantSettingsDB")
     workers = relationship("WorkerDB", back_populates="restaurant")
@@ -171,6 +255,7 @@ class RestaurantFlagDB(Base):
     id = mapped_column(Integer, primary_key=True, index=True)
     name = mapped_column(String, nullable=False)
     description = mapped_column(String)
+    bit = mapped_column(Integer, nullable=False, unique=True)
 
 
 class RestaurantSettingsDB(Base):
@@ -180,6 +265,7 @@ class RestaurantSettingsDB(Base):
     restaurant_id = mapped_column(Integer, ForeignKey("restaurants.id"), nullable=False)
     flag_id = mapped_column(Integer, ForeignKey("restaurant_flags.id"), nullable=False)
     setting = mapped_column(Boolean, default=False)
+    flag = relationship("RestaurantFlagDB")
 
 
 class RestaurantHoursDB(Base):
@@ -193,6 +279,54 @@ class RestaurantHoursDB(Base):
     closed = mapped_column(Boolean)
 
 
+@event.listens_for(RestaurantDB, "before_insert")
+def set_restaurant_default_flags_mask(mapper, connection, target: RestaurantDB):
+    target.flags_mask = connection.scalar(
+        select(func.coalesce(func.sum(literal(1).op("<<")(RestaurantFlagDB.bit)), 0))
+    )
+
+
+@event.listens_for(RestaurantDB, "after_insert")
+def insert_restaurant_defaults(mapper, connection, target: RestaurantDB):
+    connection.execute(
+        insert(RestaurantSettingsDB).from_select(
+            ["restaurant_id", "flag_id", "setting"],
+            select(literal(target.id), RestaurantFlagDB.id, true()),
+        )
+    )
+    connection.execute(
+        insert(RestaurantHoursDB),
+        [
+            {
+                "restaurant_id": target.id,
+                "day_of_week": i,
+                "open_time": None,
+                "close_time": None,
+                "temporary": False,
+                "closed": True,
+            }
+            for i in range(7)
+        ],
+    )
+
+
+def load_restaurant_flags(db: Session) -> list[dict]:
+    return [x.to_dict() for x in db.query(RestaurantFlagDB).order_by(RestaurantFlagDB.id)]
+
+
+def load_restaurant_flag_bits(db: Session) -> dict[int, int]:
+    bits = {x.id: x.bit for x in db.query(RestaurantFlagDB.id, RestaurantFlagDB.bit)}
+    known = {x.value.bit_length() - 1 for x in RestaurantFlag}
+    unknown = sorted(set(bits.values()) - known)
+    if unknown:
+        raise RuntimeError(f"restaurant_flags uses bits missing from RestaurantFlag: {unknown}")
+    return bits
+
+
+reference_data.register("restaurant_flags", load_restaurant_flags)
+reference_data.register("restaurant_flag_bits", load_restaurant_flag_bits)
+
+
 async def get_restaurant(db: Session, id: int) -> RestaurantFull:
     return db.query(RestaurantDB).filter(RestaurantDB.id == id).first()
 
@@ -201,37 +335,49 @@ async def get_restaurant_db(db: Session, id: int) -> RestaurantDB:
     return db.query(RestaurantDB).filter(RestaurantDB.id == id).first()
 
 
+async def get_restaurant_full_info(db: Session, id: int) -> RestaurantInfo | None:
+    restaurant = (
+        db.query(RestaurantDB)
+        .options(
+            joinedload(RestaurantDB.opening_hours),
+            joinedload(RestaurantDB.flags),
+        )
+        .filter(RestaurantDB.id == id)
+        .first()
+    )
+    if restaurant is None:
+        return None
+    return RestaurantInfo(
+        **restaurant.to_dict(),
+        opening_hours=hours_to_dict(restaurant.opening_hours),
+        flags=flags_to_list(db, {x.flag_id: x.setting for x in restaurant.flags}),
+    )
+
+
 async def get_restaurant_flags(db: Session, id: int) -> list[RestaurantFlags]:
-    flags = db.query(RestaurantFlagDB).all()
     restaurantFlags = (
         db.query(RestaurantSettingsDB)
         .filter(RestaurantSettingsDB.restaurant_id == id)
         .all()
     )
-    restaurantFlags = {x.flag_id: x for x in restaurantFlags}
-    returnFlags = []
-    for flag in flags:
-        if flag.id in restaurantFlags:
-            returnFlags.append(
-                RestaurantFlags(
-                    **flag.to_dict(), setting=restaurantFlags[flag.id].setting
-                )
-            )
-        else:
-            newFlag = RestaurantSettingsDB(
-                restaurant_id=id, flag_id=flag.id, setting=True
-            )
-            returnFlags.append(RestaurantFlags(**flag.to_dict(), setting=True))
-            db.add(newFlag)
-    if len(restaurantFlags) < len(flags):
-        db.commit()
-    return returnFlags
+    return flags_to_list(db, {x.flag_id: x.setting for x in restaurantFlags})
+
+
+def flags_to_list(db: Session, settings: dict[int, bool]) -> list[RestaurantFlags]:
+    return [
+        RestaurantFlags(**flag, setting=settings.get(flag["id"], True))
+        for flag in reference_data.get(db, "restaurant_flags")
+    ]
 
 
 async def get_restaurant_hours(db: Session, id: int) -> dict[int, RestaurantHour]:
     hours = (
         db.query(RestaurantHoursDB).filter(RestaurantHoursDB.restaurant_id == id).all()
     )
+    return hours_to_dict(hours)
+
+
+def hours_to_dict(hours: list[RestaurantHoursDB]) -> dict[int, RestaurantHour]:
     hoursDict = {x.day_of_week: x for x in hours}
     returnHours = dict()
     for i in range(7):
@@ -246,30 +392,16 @@ async def get_restaurant_hours(db: Session, id: int) -> dict[int, RestaurantHour
                 if hoursDict[i].close_time is None
                 else hoursDict[i].close_time.strftime("%H:%M")
             )
-            returnHours[i] = {
-                "open_time": open_time,
-                "close_time": close_time,
-                "temporary": hoursDict[i].temporary,
-                "closed": hoursDict[i].closed,
-            }
+            returnHours[i] = RestaurantHour(
+                open_time=open_time,
+                close_time=close_time,
+                temporary=hoursDict[i].temporary,
+                closed=hoursDict[i].closed,
+            )
         else:
-            newHour = RestaurantHoursDB(
-                restaurant_id=id,
-                day_of_week=i,
-                temporary=False,
-                open_time=None,
-                close_time=None,
-                closed=True,
+            returnHours[i] = RestaurantHour(
+                open_time="", close_time="", temporary=False, closed=True
             )
-            db.add(newHour)
-            returnHours[i] = {
-                "open_time": "",
-                "close_time": "",
-                "temporary": False,
-                "closed": True,
-            }
-    if len(hoursDict) < 7:
-        db.commit()
     return returnHours
 
 
@@ -315,6 +447,17 @@ async def update_restaurant_flags(
                 restaurant_id=restaurant_id, flag_id=flag.id, setting=flag.setting
             )
             db.add(newFlag)
+    # flags missing from the request keep their stored setting, and flags without a
+    # settings row count as enabled, the same as in flags_to_list
+    settings = {flag_id: x.setting for flag_id, x in previousFlags.items()}
+    settings.update({x.id: x.setting for x in flags})
+    mask = 0
+    for flag in reference_data.get(db, "restaurant_flags"):
+        if settings.get(flag["id"], True):
+            mask |= flag_bit(db, flag["id"])
+    db.query(RestaurantDB).filter(RestaurantDB.id == restaurant_id).update(
+        {"flags_mask": mask}
+    )
     db.commit()
 
 
@@ -323,9 +466,11 @@ async def update_restaurant_opening_hours(
 ):
     previousHours = (
         db.query(RestaurantHoursDB)
-        .filter(RestaurantSettingsDB.restaurant_id == restaurant_id)
+        .filter(RestaurantHoursDB.restaurant_id == restaurant_id)
         .all()
     )
+    # the bitmap covers the whole week, so days missing from the request keep their hours
+    weekHours = hours_to_dict(previousHours) | opening_hours
     previousHours = {x.day_of_week: x for x in previousHours}
     for day in opening_hours:
         if day in previousHours:
@@ -355,6 +500,9 @@ async def update_restaurant_opening_hours(
                 closed=opening_hours[day].closed,
             )
             db.add(newHour)
+    db.query(RestaurantDB).filter(RestaurantDB.id == restaurant_id).update(
+        {"opening_hours_mask": opening_hours_bitmap(weekHours)}
+    )
     db.commit()
 
 
@@ -380,8 +528,26 @@ async def update_restaurant_photo(
 async def get_restaurants_by_search(
     db: Session, options: RestaurantSearch
 ) -> list[RestaurantBase]:
-    restaurants = db.query(RestaurantDB).all()
-    print(options)
+    query = db.query(RestaurantDB)
+    if options.has_free_tables is not None:
+        date = datetime.datetime.now()
+        if len(options.days_available) == 0:
+            current_slot = time_to_slot(date.time())
+            window = slots_bitmap({date.weekday(): (current_slot, current_slot + 1)})
+        else:
+            window = slots_bitmap(
+                {
+                    day: (options.time_start * 4, options.time_end * 4)
+                    for day in options.days_available
+                }
+            )
+        query = query.filter(
+            RestaurantDB.opening_hours_mask.op("&")(literal(window, OpeningHoursBitmap))
+            != literal(EMPTY_OPENING_HOURS, OpeningHoursBitmap)
+        )
+    if options.has_free_tables:
+        query = query.filter(reservations_enabled())
+    restaurants = query.all()
     if len(options.search_name) > 0:
         restaurants = filter(
             lambda x: options.search_name.lower() in x.name.lower(), restaurants
@@ -389,70 +555,49 @@ async def get_restaurants_by_search(
     if options.has_free_tables is not None:
         new_restaurants = []
         if len(options.days_available) == 0:
-            date = datetime.datetime.now()
-            currentWeekday = int(date.strftime("%w")) - 1
-            if currentWeekday < 0:
-                currentWeekday = 6
-            currentHour = date.time()
+            day_start = date.weekday() * SLOTS_PER_DAY
             for restaurant in restaurants:
-                result = any(
-                    (day := hour).day_of_week == currentWeekday
-                    for hour in restaurant.opening_hours
-                )
-                if result and not day.closed:
-                    reservation_close_time = (
-                        datetime.datetime(
-                            2000, 1, 1, day.close_time.hour, day.close_time.minute
-                        )
-                        - datetime.timedelta(hours=restaurant.reservation_hour_length)
-                    ).time()
-                if (
-                    result
-                    and not day.closed
-                    and day.open_time < currentHour
-                    and reservation_close_time
-                    > currentHour + restaurant.reservation_hour_length
-                ):
-                    if options.has_free_tables:
-                        tables = get_free_tables_for_time(
-                            db, restaurant.id, date, options.guests_amount
-                        )
-                        if len(tables) > 0:
-                            new_restaurants.append(restaurant)
-                    else:
+                needed_slots = reservation_slots(restaurant.reservation_hour_length)
+                if current_slot + needed_slots > SLOTS_PER_DAY or "0" in restaurant.opening_hours_mask[
+                    day_start + current_slot : day_start + current_slot + needed_slots
+                ]:
+                    continue
+                if options.has_free_tables:
+                    tables = await get_free_tables_for_time(
+                        db, restaurant.id, date, options.guests_amount
+                    )
+                    if len(tables) > 0:
                         new_restaurants.append(restaurant)
+                else:
+                    new_restaurants.append(restaurant)
         else:
-            begin_time = datetime.time(options.time_start, 0, 0)
-            end_time = datetime.time(options.time_end, 0, 0)
             for restaurant in restaurants:
-                for day in options.days_available:
-                    result = any(
-                        (relevant_day := hour).day_of_week == day
-                        for hour in restaurant.opening_hours
-                    )
-                    if result and not relevant_day.closed:
-                        min_overlap = max(relevant_day.open_time,begin_time)
-                        max_overlap = min(relevant_day.close_time,end_time)
-                    if (
-                        ((max_overlap.hour*60+ max_overlap.minute)/60 - (min_overlap.hour*60 + min_overlap.minute)/60) >= restaurant.reservation_hour_length
-                    ):
-                        new_restaurants.append(restaurant)
-                        break
+                overlap = bitmap_and(restaurant.opening_hours_mask, window)
+                needed_slots = reservation_slots(restaurant.reservation_hour_length)
+                if any(
+                    day_slots_count(overlap, day) >= needed_slots
+                    for day in options.days_available
+                ):
+                    new_restaurants.append(restaurant)
         restaurants = new_restaurants
-    restaurants = filter(
-        lambda x: haversine_distance(
-            (options.latitude, options.longitude), (x.latitude, x.longitude)
-        )
-        < options.distance_in_km,
-        restaurants,
+    restaurants = filter_by_distance(
+        restaurants, options.latitude, options.longitude, options.distance_in_km
     )
-    restaurants = list(restaurants)
-    restaurants.sort(
-        key=lambda x: haversine_distance(
-            (options.latitude, options.longitude), (x.latitude, x.longitude)
-        )
-    )
-    return [RestaurantBase(**x.to_dict()) for x in restaurants]
-
+    return [RestaurantBase.model_validate(x) for x in restaurants]
+
+
+def filter_by_distance(
+    restaurants: Iterable[RestaurantDB],
+    latitude: float,
+    longitude: float,
+    distance_in_km: float,
+) -> list[RestaurantDB]:
+    distances = [
+        (haversine_distance((latitude, longitude), (x.latitude, x.longitude)), x)
+        for x in restaurants
+    ]
+    distances = [x for x in distances if x[0] < distance_in_km]
+    distances.sort(key=lambda x: x[0])
+    return [x for _, x in distances]
 
 from models.table import get_free_tables_for_time
@@ -1,8 +1,8 @@
 from __future__ import annotations
 from datetime import date, datetime, timedelta
 from enum import Enum
-from pydantic import BaseModel
-from sqlalchemy import ForeignKey, Integer, Boolean, Enum as SQLEnum, String, func, and_, cast, Date
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import ForeignKey, Integer, Boolean, Enum as SQLEnum, String, func, and_, cast, Date, lambda_stmt, select
 from config import Base
 from sqlalchemy.orm import relationship, mapped_column, Session
 from itertools import product
@@ -50,6 +50,7 @@ class RestaurantBorderType(str, Enum):
 
 
 class RestaurantTable(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     real_id: str
     left: int
     top: int
@@ -70,6 +71,7 @@ class RestaurantTable(BaseModel):
 
 
 class RestaurantBorder(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     left: int
     top: int
     is_horizontal: bool
@@ -229,19 +231,45 @@ class RestaurantBorderDB(Base):
 async def get_restaurant_tables(
     db: Session, restaurant_id: int
 ) -> list[RestaurantTableDB]:
-    return (
-        db.query(RestaurantTableDB)
-        .filter(RestaurantTableDB.restaurant_id == restaurant_id)
-        .order_by(RestaurantTableDB.real_id)
-    )
+    return db.scalars(
+        lambda_stmt(
+            lambda: select(RestaurantTableDB)
+            .where(RestaurantTableDB.restaurant_id == restaurant_id)
+            .order_by(RestaurantTableDB.real_id)
+        )
+    ).all()
 
 
 async def get_restaurant_borders(
     db: Session, restaurant_id: int
 ) -> list[RestaurantBorderDB]:
-    return db.query(RestaurantBorderDB).filter(
-        RestaurantBorderDB.restaurant_id == restaurant_id
+    return db.scalars(
+        lambda_stmt(
+            lambda: select(RestaurantBorderDB).where(
+                RestaurantBorderDB.restaurant_id == restaurant_id
+            )
+        )
+    ).all()
+
+
+async def get_planner_info(db: Session, restaurant_id: int) -> PlannerInfo:
+    # from_attributes validation of ORM objects measured slower than splatting to_dict()
+    tables = [
+        RestaurantTable(**x.to_dict())
+        for x in await get_restaurant_tables(db=db, restaurant_id=restaurant_id)
+    ]
+    borders = [
+        RestaurantBorder(**x.to_dict())
+        for x in await get_restaurant_borders(db=db, restaurant_id=restaurant_id)
+    ]
+    precision = db.scalar(
+        lambda_stmt(
+            lambda: select(RestaurantDB.plan_precision).where(
+                RestaurantDB.id == restaurant_id
+            )
+        )
     )
+    return PlannerInfo(precision=precision, tables=tables, borders=borders)
 
 
 async def update_borders(
@@ -320,37 +348,25 @@ async def update_tables(
     db.commit()
 
 
-async def get_free_tables_for_time(
-    db: Session,
+def get_restaurant_reservation_length(db: Session, restaurant_id: int) -> float:
+    return db.scalar(
+        lambda_stmt(
+            lambda: select(RestaurantDB.reservation_hour_length).where(
+                RestaurantDB.id == restaurant_id
+            )
+        )
+    )
+
+
+def _free_tables_stmt(
     restaurant_id: int,
     date: datetime,
+    end_date: datetime,
     guests_amount: int,
     table_id: str | None = None,
-    end_date: datetime | None = None,
-) -> list[RestaurantTableDB]:
-    restaurant_reservation_length = (
-        db.query(RestaurantDB.reservation_hour_length)
-        .filter(RestaurantDB.id == restaurant_id)
-        .scalar()
-    )
-    if end_date is None:
-        end_date = date
-    end_date = end_date + timedelta(hours=restaurant_reservation_length)
-
-    filters = [
-        RestaurantDB.id == restaurant_id,
-        RestaurantTableDB.seats_bottom
-        + RestaurantTableDB.seats_left
-        + RestaurantTableDB.seats_right
-        + RestaurantTableDB.seats_top
-        >= guests_amount,
-        ReservationDB.id == None,
-    ]
-    if table_id is not None:
-        filters.append(RestaurantTableDB.real_id == table_id)
-
-    return (
-        db.query(RestaurantTableDB)
+):
+    statement = lambda_stmt(
+        lambda: select(RestaurantTableDB)
         .join(
             RestaurantDB,
             RestaurantTableDB.restaurant_id == RestaurantDB.id,
@@ -366,7 +382,35 @@ async def get_free_tables_for_time(
             ),
             isouter=True,
         )
-        .filter(*filters)
+        .where(
+            RestaurantDB.id == restaurant_id,
+            reservations_enabled(),
+            RestaurantTableDB.seats_bottom
+            + RestaurantTableDB.seats_left
+            + RestaurantTableDB.seats_right
+            + RestaurantTableDB.seats_top
+            >= guests_amount,
+            ReservationDB.id == None,
+        )
+    )
+    if table_id is not None:
+        statement += lambda s: s.where(RestaurantTableDB.real_id == table_id)
+    return statement
+
+async def get_free_tables_for_time(
+    db: Session,
+    restaurant_id: int,
+    date: datetime,
+    guests_amount: int,
+    table_id: str | None = None,
+    end_date: datetime | None = None,
+) -> list[RestaurantTableDB]:
+    restaurant_reservation_length = get_restaurant_reservation_length(db, restaurant_id)
+    if end_date is None:
+        end_date = date
+    end_date = end_date + timedelta(hours=restaurant_reservation_length)
+    return db.scalars(
+        _free_tables_stmt(restaurant_id, date, end_date, guests_amount, table_id)
     ).all()
 
 async def is_table_free_now(
@@ -374,11 +418,7 @@ async def is_table_free_now(
     restaurant_id: int,
     table_id: str,
 ) -> RestaurantTableDB | None:
-    restaurant_reservation_length = (
-        db.query(RestaurantDB.reservation_hour_length)
-        .filter(RestaurantDB.id == restaurant_id)
-        .scalar()
-    )
+    restaurant_reservation_length = get_restaurant_reservation_length(db, restaurant_id)
     date = datetime.now()
     end_date = date + timedelta(hours=restaurant_reservation_length)
 
@@ -414,37 +454,75 @@ async def get_restaurant_free_timeslots_for_day(
     day: date,
     guests_amount: int
 )->list[datetime]:
-    restaurant_hours = db.query(RestaurantHoursDB).filter(RestaurantHoursDB.restaurant_id==restaurant_id,RestaurantHoursDB.day_of_week == day.weekday()).first()
+    day_of_week = day.weekday()
+    restaurant_hours = db.scalars(
+        lambda_stmt(
+            lambda: select(RestaurantHoursDB)
+            .join(RestaurantDB, RestaurantDB.id == RestaurantHoursDB.restaurant_id)
+            .where(
+                RestaurantHoursDB.restaurant_id == restaurant_id,
+                RestaurantHoursDB.day_of_week == day_of_week,
+                reservations_enabled(),
+            )
+        )
+    ).first()
     if restaurant_hours is None or restaurant_hours.closed:
         return []
-    restaurant_reservation_length = (
-        db.query(RestaurantDB.reservation_hour_length)
-        .filter(RestaurantDB.id == restaurant_id)
-        .scalar()
-    )
+    restaurant_reservation_length = get_restaurant_reservation_length(db, restaurant_id)
     reservation_length = timedelta(hours=restaurant_reservation_length)
     start_date = datetime(day.year,day.month,day.day,restaurant_hours.open_time.hour,(restaurant_hours.open_time.minute // 15)*15,0)
     end_date = datetime(day.year,day.month,day.day,restaurant_hours.close_time.hour,(restaurant_hours.close_time.minute // 15)*15,0)
-    interval = timedelta(minutes=15)
-    date = start_date
-
-    appropriate_tables = db.query(RestaurantTableDB.id).filter(RestaurantTableDB.seats_bottom
-        + RestaurantTableDB.seats_left
-        + RestaurantTableDB.seats_right
-        + RestaurantTableDB.seats_top
-        >= guests_amount, RestaurantTableDB.restaurant_id==restaurant_id).all()
-    appropriate_tables_ids = [x[0] for x in appropriate_tables]
-    day_reservations : list[ReservationDB] = db.query(ReservationDB.id,ReservationDB.date).filter(ReservationDB.restaurant_id==restaurant_id,ReservationDB.status != ReservationStatus.rejected,
-        ReservationDB.table.in_(appropriate_tables_ids),cast(ReservationDB.date,Date) == day
+    if restaurant_hours.close_time.hour == 0 and restaurant_hours.close_time.minute < 15:
+        end_date = end_date + timedelta(days=1)
+
+    appropriate_tables = db.scalars(
+        lambda_stmt(
+            lambda: select(RestaurantTableDB.id).where(
+                RestaurantTableDB.seats_bottom
+                + RestaurantTableDB.seats_left
+                + RestaurantTableDB.seats_right
+                + RestaurantTableDB.seats_top
+                >= guests_amount,
+                RestaurantTableDB.restaurant_id == restaurant_id,
+            )
+        )
+    ).all()
+    day_reservations = db.execute(
+        lambda_stmt(
+            lambda: select(ReservationDB.id, ReservationDB.date).where(
+                ReservationDB.restaurant_id == restaurant_id,
+                ReservationDB.status != ReservationStatus.rejected,
+                ReservationDB.table.in_(appropriate_tables),
+                cast(ReservationDB.date, Date) == day,
+            )
+        )
     ).all()
 
+    return free_timeslots(
+        start_date,
+        end_date,
+        reservation_length,
+        [x.date for x in day_reservations],
+        len(appropriate_tables),
+    )
+
+
+def free_timeslots(
+    start_date: datetime,
+    end_date: datetime,
+    reservation_length: timedelta,
+    reservation_dates: list[datetime],
+    tables_count: int,
+) -> list[datetime]:
+    interval = timedelta(minutes=15)
+    date = start_date
     available_dates = []
     while date<=end_date:
-        if len(list(filter(lambda x: not (date+reservation_length < x.date or x.date+reservation_length<date),day_reservations))) < len(appropriate_tables):
+        if len(list(filter(lambda x: not (date+reservation_length < x or x+reservation_length<date),reservation_dates))) < tables_count:
             available_dates.append(date)
         date = date + interval
     return available_dates
 
 from models.reservation import ReservationDB, ReservationStatus
 
-from models.restaurant import RestaurantDB, RestaurantHoursDB
\ No newline at end of file
+from models.restaurant import RestaurantDB, RestaurantHoursDB, reservations_enabled
\ No newline at end of file
@@ -1,8 +1,7 @@
 from typing import Annotated
-import uuid
 from fastapi import APIRouter, Body, Depends, File, HTTPException, Security, UploadFile
-from config import get_db, getEnv
-from mailing import send_activation_mail_to_worker, send_password_reset_mail_to_worker
+from config import get_db
+from mailing import send_activation_mail_to_worker, send_notice_to_restaurant_workers, send_password_reset_mail_to_worker
 from models.menu import (
     RestaurantMenuCategoryDB,
     RestaurantMenuCategory,
@@ -23,8 +22,7 @@ from models.restaurant import (
     RestaurantInfo,
     UpdateRestaurantInfo,
     get_restaurant,
-    get_restaurant_flags,
-    get_restaurant_hours,
+    get_restaurant_full_info,
     get_restaurant_photo,
     update_precision,
     update_restaurant_contact,
@@ -37,6 +35,7 @@ from models.table import (
     PlannerInfo,
     RestaurantBorder,
     RestaurantTable,
+    get_planner_info,
     get_restaurant_borders,
     get_restaurant_tables,
     update_borders,
@@ -61,13 +60,24 @@ from models.user import (
 
 from sqlalchemy.orm import Session
 from security.token import get_current_active_user, get_password_hash
-from supabase import create_client, Client
+from response_cache import response_cache
+from storage import Storage, get_storage, release_photo, store_photo
 from hashlib import sha256
 
+async def invalidate_restaurant_cache(
+    owner: Annotated[Owner, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+):
+    response_cache.invalidate_on_commit(db, owner.restaurant_id)
+
+
 ownersRouter = APIRouter(
     prefix="/api/owners",
     tags=["owners"],
-    dependencies=[Security(get_current_active_user, scopes=["owner:basic"])],
+    dependencies=[
+        Security(get_current_active_user, scopes=["owner:basic"]),
+        Depends(invalidate_restaurant_cache),
+    ],
     responses={404: {"description": "Błąd aplikacji"}},
 )
 
@@ -91,7 +101,7 @@ async def create_worker(
     else:
         worker_create = CreateWorkerDB(**worker_dict, restaurant=owner.restaurant_id)
         worker_created = await insert_worker(db=db, worker=worker_create)
-    mail_status = await send_activation_mail_to_worker(worker_created)
+    mail_status = await send_activation_mail_to_worker(db, worker_created)
     if mail_status:
         return {
             "message": "Konto użytkownika utworzono prawidłowo. Hasło będzie mógł on ustawić przy pomocy klucz wysłanego w wiadomości mailowej",
@@ -119,17 +129,32 @@ async def resend_worker_activation_link(
             detail="Przed zresetowaniem hasła kelnerowi odblokuj jego konto",
         )
     if worker.status == AccountStatus.active:
-        await send_password_reset_mail_to_worker(worker)
+        await send_password_reset_mail_to_worker(db, worker)
         return {
             "message": "Klucz do zresetowania hasła został wysłany do kelnera w wiadomości mailowej."
         }
     elif worker.status == AccountStatus.disabled:
-        await send_activation_mail_to_worker(worker)
+        await send_activation_mail_to_worker(db, worker)
         return {
             "message": "Klucz do aktywacji konta został wysłany do kelnera w wiadomości mailowej."
         }
 
 
+@ownersRouter.post("/notify-workers")
+async def notify_workers(
+    owner: Annotated[Owner, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    message: Annotated[str, Body(embed=True)],
+):
+    if len(message) == 0 or len(message) > 2000:
+        raise HTTPException(status_code=400, detail="Nieprawidłowa treść wiadomości")
+    if not await send_notice_to_restaurant_workers(
+        db=db, restaurant_id=owner.restaurant_id, message=message
+    ):
+        raise HTTPException(status_code=400, detail="Brak aktywnych kelnerów")
+    return {"message": "Wiadomość zostanie wysłana do wszystkich aktywnych kelnerów"}
+
+
 @ownersRouter.post("/workers-list")
 async def workers_list(
     owner: Annotated[Owner, Depends(get_current_active_user)],
@@ -202,13 +227,7 @@ async def get_restaurant_info(
     owner: Annotated[Owner, Depends(get_current_active_user)],
     db: Annotated[Session, Depends(get_db)],
 ) -> RestaurantInfo:
-    restaurantDB = await get_restaurant(db=db, id=owner.restaurant_id)
-    hours = await get_restaurant_hours(db=db, id=owner.restaurant_id)
-    flags = await get_restaurant_flags(db=db, id=owner.restaurant_id)
-    restaurant = RestaurantInfo(
-        **restaurantDB.to_dict(), opening_hours=hours, flags=flags
-    )
-    return restaurant
+    return await get_restaurant_full_info(db=db, id=owner.restaurant_id)
 
 
 @ownersRouter.get(("/planner-info"))
@@ -216,18 +235,7 @@ async def get_restaurant_planner_info(
     owner: Annotated[Owner, Depends(get_current_active_user)],
     db: Annotated[Session, Depends(get_db)],
 ) -> PlannerInfo:
-    tables = [
-        RestaurantTable(**x.to_dict())
-        for x in await get_restaurant_tables(db=db, restaurant_id=owner.restaurant_id)
-    ]
-    borders = [
-        RestaurantBorder(**x.to_dict())
-        for x in await get_restaurant_borders(db=db, restaurant_id=owner.restaurant_id)
-    ]
-    restaurant = await get_restaurant(db=db, id=owner.restaurant_id)
-    return PlannerInfo(
-        precision=restaurant.plan_precision, tables=tables, borders=borders
-    )
+    return await get_planner_info(db=db, restaurant_id=owner.restaurant_id)
 
 
 @ownersRouter.post("/save-precision")
@@ -296,7 +304,7 @@ async def restaurant_menu(
     db: Annotated[Session, Depends(get_db)],
 ) -> RestaurantMenuFull:
     return RestaurantMenuFull(
-        menu=[RestaurantMenuCategory(**x.to_dict(),items=[RestaurantMenuItem(**y.to_dict()) for y in x.items])
+        menu=[RestaurantMenuCategory.model_validate(x)
         for x in await get_restaurant_menu(db=db, restaurant_id=owner.restaurant_id)],
         photo_url=await get_restaurant_photo(db=db, restaurant_id=owner.restaurant_id),
     )
@@ -399,61 +407,38 @@ async def update_restaurant_category_name(
 async def upload_restaurant_photo(
     owner: Annotated[Owner, Depends(get_current_active_user)],
     db: Annotated[Session, Depends(get_db)],
+    storage: Annotated[Storage, Depends(get_storage)],
     file: UploadFile,
 ) -> str:
-    name = uuid.uuid4().hex + ".png"
-    bytes = await file.read()
-    supabase: Client = create_client(
-        supabase_url=getEnv().supabase_url, supabase_key=getEnv().supabase_key
-    )
-    bucket = supabase.storage.from_("menuitemspictures")
-
-    bucket.upload(
-        file=bytes,
-        path="restaurant_pictures/" + name,
-        file_options={"content-type": "image/png"},
-    )
-    photo_url = bucket.get_public_url("restaurant_pictures/" + name).split("?")[0]
+    photo_url = await store_photo(db, storage, file, "restaurant_pictures")
     old_photo_url = await update_restaurant_photo(
         db=db, restaurant_id=owner.restaurant_id, photo_url=photo_url
     )
     if len(old_photo_url) > 0:
-        bucket.remove([old_photo_url.split("menuitemspictures/")[1]])
+        await release_photo(db, old_photo_url)
     return photo_url
 
 @ownersRouter.post('/upload-item-photo')
 async def upload_item_photo( 
     owner: Annotated[Owner, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+    storage: Annotated[Storage, Depends(get_storage)],
     file: UploadFile,
 )-> str:
-    name = uuid.uuid4().hex + ".png"
-    bytes = await file.read()
     restaurant_name_hash = sha256(owner.restaurant.name.encode()).hexdigest()
-
-    supabase: Client = create_client(
-        supabase_url=getEnv().supabase_url, supabase_key=getEnv().supabase_key
+    return await store_photo(
+        db, storage, file, "restaurant_pictures/" + restaurant_name_hash
     )
-    bucket = supabase.storage.from_("menuitemspictures")
-
-    bucket.upload(
-        file=bytes,
-        path="restaurant_pictures/" + restaurant_name_hash + "/" + name,
-        file_options={"content-type": "image/png"},
-    )
-    photo_url = bucket.get_public_url("restaurant_pictures/" + restaurant_name_hash + "/" + name).split("?")[0]
-    return photo_url
 
 @ownersRouter.post('/delete-uploaded-photo')
 async def delete_uploaded_photo( 
     owner: Annotated[Owner, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
     url: Annotated[str, Body(embed=True)],
 ) -> bool:
     if sha256(owner.restaurant.name.encode()).hexdigest() not in url:
         raise HTTPException(status_code=400, detail="Nie masz dostępu do tego zasobu")
-    supabase: Client = create_client(
-        supabase_url=getEnv().supabase_url, supabase_key=getEnv().supabase_key
-    )
-    supabase.storage.from_("menuitemspictures").remove([url.split("menuitemspictures/")[1]])
+    await release_photo(db, url)
     return True
 
 @ownersRouter.post('/update-item')
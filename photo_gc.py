@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta
+import logging
+from config import DBSession, getEnv
+from images import photo_variant_paths
+from models.menu import RestaurantMenuItemDB
+from models.photo import (
+    PhotoDB,
+    PhotoDeletionDB,
+    finish_photo_deletions,
+    lease_photo_deletions,
+    mark_photo_deletions_failed,
+    queue_photo_deletions,
+)
+from models.restaurant import RestaurantDB
+from storage import BUCKET, StoredObject, get_storage, photo_paths_from_url
+
+logger = logging.getLogger(__name__)
+
+PHOTOS_PREFIX = "restaurant_pictures"
+
+
+class PhotoGarbageCollector:
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.last_reconciliation: datetime | None = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self):
+        while True:
+            try:
+                if self.last_reconciliation is None or datetime.now() - self.last_reconciliation > timedelta(
+                    seconds=getEnv().photo_gc_reconcile_interval_seconds
+                ):
+                    self.last_reconciliation = datetime.now()
+                    await self.reconcile()
+                removed = await self.collect_batch()
+            except Exception:
+                logger.exception("Photo garbage collection failed")
+                removed = 0
+            if removed < getEnv().photo_gc_batch_size:
+                await asyncio.sleep(getEnv().photo_gc_poll_seconds)
+
+    async def collect_batch(self) -> int:
+        db = DBSession()
+        try:
+            claimed, paths = await asyncio.to_thread(
+                lease_photo_deletions,
+                db,
+                getEnv().photo_gc_batch_size,
+                getEnv().photo_gc_lease_seconds,
+            )
+            if len(paths) == 0:
+                return claimed
+            try:
+                await asyncio.to_thread(get_storage().remove, paths)
+            except Exception as e:
+                await asyncio.to_thread(
+                    mark_photo_deletions_failed,
+                    db,
+                    paths,
+                    str(e),
+                    getEnv().photo_gc_max_attempts,
+                    getEnv().photo_gc_backoff_seconds,
+                )
+            else:
+                await asyncio.to_thread(finish_photo_deletions, db, paths)
+            return claimed
+        finally:
+            db.close()
+
+    async def reconcile(self) -> int:
+        stored = await asyncio.to_thread(get_storage().list, PHOTOS_PREFIX)
+        return await asyncio.to_thread(self.queue_orphans, stored)
+
+    def queue_orphans(self, stored: list[StoredObject]) -> int:
+        db = DBSession()
+        try:
+            referenced: set[str] = set()
+            for path, in db.query(PhotoDB.path):
+                referenced.update(photo_variant_paths(path))
+            for url, in db.query(RestaurantDB.photo_url).filter(RestaurantDB.photo_url.contains(BUCKET + "/")):
+                referenced.update(photo_paths_from_url(url))
+            for url, in db.query(RestaurantMenuItemDB.photo_url).filter(RestaurantMenuItemDB.photo_url.contains(BUCKET + "/")):
+                referenced.update(photo_paths_from_url(url))
+            referenced.update(x for x, in db.query(PhotoDeletionDB.path))
+            min_updated_at = datetime.now() - timedelta(seconds=getEnv().photo_gc_min_age_seconds)
+            orphaned = [
+                x.path
+                for x in stored
+                if x.path not in referenced
+                and x.updated_at is not None
+                and x.updated_at < min_updated_at
+            ]
+            queue_photo_deletions(db, orphaned)
+            return len(orphaned)
+        finally:
+            db.close()
+
+
+photo_gc = PhotoGarbageCollector()
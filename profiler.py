@@ -0,0 +1,39 @@
+from collections import Counter
+import sys
+import threading
+from time import perf_counter, sleep
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+
+def collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float) -> Counter[str]:
+    samples: Counter[str] = Counter()
+    own_thread = threading.get_ident()
+    thread_names = {x.ident: x.name for x in threading.enumerate()}
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            thread = thread_names.get(thread_id, str(thread_id))
+            samples[f"{thread};{collapse(frame)}"] += 1
+        sleep(interval)
+    return samples
+
+
+def format_collapsed(samples: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+profiling_lock = threading.Lock()
@@ -0,0 +1,115 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+from time import perf_counter
+from typing import Iterator
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import DBEngine, ReplicaEngines, getEnv
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        return [(x, n) for x, n in self.statements.most_common() if n >= threshold]
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, stats: QueryStats, budget: int):
+        super().__init__(f"{stats.count} queries executed, budget is {budget}")
+        self.stats = stats
+        self.budget = budget
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    duration = perf_counter() - conn.info["query_start_time"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+for engine in [DBEngine, *ReplicaEngines]:
+    event.listen(engine, "before_cursor_execute", start_query_timer)
+    event.listen(engine, "after_cursor_execute", record_query)
+
+
+@contextmanager
+def collect_query_stats() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+@contextmanager
+def query_budget(budget: int) -> Iterator[QueryStats]:
+    with collect_query_stats() as stats:
+        yield stats
+    if stats.count > budget:
+        raise QueryBudgetExceeded(stats, budget)
+
+
+def server_timing(stats: QueryStats) -> str:
+    return f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+
+
+def log_query_stats(scope: Scope, stats: QueryStats):
+    logger.debug(
+        "%s %s: %d queries in %.1f ms",
+        scope["method"],
+        scope["path"],
+        stats.count,
+        stats.duration * 1000,
+    )
+    for statement, count in stats.repeated_statements(getEnv().query_repeat_threshold):
+        logger.warning(
+            "%s %s: statement executed %d times, possible N+1: %s",
+            scope["method"],
+            scope["path"],
+            count,
+            statement,
+        )
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with collect_query_stats() as stats:
+
+            async def send_with_timing(message: Message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(stats))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+        log_query_stats(scope, stats)
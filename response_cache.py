@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Hashable
+from fastapi import Response
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from compression import compress, response_encoding, should_compress
+from config import DBSession, getEnv
+from models.restaurant import RestaurantDB
+
+
+def serialize_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=serialize_default)
+
+
+class CachedPayload:
+    def __init__(self, body: bytes, expires_at: float):
+        self.body = body
+        self.expires_at = expires_at
+        self.encoded: dict[str, bytes] = {}
+
+    def response(self, encoding: str | None) -> Response:
+        if encoding is None or not should_compress(self.body):
+            return Response(content=self.body, media_type="application/json")
+        body = self.encoded.get(encoding)
+        if body is None:
+            body = self.encoded[encoding] = compress(self.body, encoding)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+
+
+class ResponseCache:
+    def __init__(self):
+        self.entries: OrderedDict[tuple, CachedPayload] = OrderedDict()
+
+    def invalidate_on_commit(self, db: Session, restaurant_id: int):
+        db.info["invalidate_restaurant"] = restaurant_id
+
+    def version(self, db: Session | None, restaurant_id: int | None) -> int:
+        # the version lives in the database so that every worker process sees a bump
+        if restaurant_id is None:
+            return 0
+        return (
+            db.scalar(
+                select(RestaurantDB.cache_version).where(RestaurantDB.id == restaurant_id)
+            )
+            or 0
+        )
+
+    def clear(self):
+        self.entries.clear()
+
+    async def get_or_build(
+        self,
+        namespace: str,
+        restaurant_id: int | None,
+        key: Hashable,
+        build: Callable[[], Awaitable[Any]],
+        ttl: float | None = None,
+        db: Session | None = None,
+    ) -> Response:
+        cache_key = (namespace, restaurant_id, self.version(db, restaurant_id), key)
+        payload = self.entries.get(cache_key)
+        if payload is None or payload.expires_at < monotonic():
+            payload = CachedPayload(
+                dumps(await build()),
+                monotonic() + (getEnv().response_cache_seconds if ttl is None else ttl),
+            )
+            self.entries[cache_key] = payload
+            if len(self.entries) > getEnv().response_cache_max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(cache_key)
+        return payload.response(response_encoding.get())
+
+
+response_cache = ResponseCache()
+
+
+@event.listens_for(DBSession, "before_commit")
+def bump_restaurant_cache_version(session: Session):
+    restaurant_id = session.info.get("invalidate_restaurant")
+    if restaurant_id is None:
+        return
+    if session.info.get("written") or session.new or session.dirty or session.deleted:
+        session.execute(
+            update(RestaurantDB)
+            .where(RestaurantDB.id == restaurant_id)
+            .values(cache_version=RestaurantDB.cache_version + 1)
+        )
@@ -0,0 +1,12 @@
+from secrets import compare_digest
+from typing import Annotated
+from fastapi import Header, HTTPException, status
+from config import getEnv
+
+
+async def verify_admin_token(x_admin_token: Annotated[str | None, Header()] = None):
+    expected = getEnv().admin_token
+    if expected is None or x_admin_token is None or not compare_digest(x_admin_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Działanie nieautoryzowane"
+        )
@@ -187,7 +187,7 @@ async def register(
     user = await create_user(
         db, data.email, data.name, get_password_hash(data.password)
     )
-    await send_activation_link_mail_to_user(user)
+    await send_activation_link_mail_to_user(db, user)
     return {"message": "Link aktwacyjny znajdziesz na swojej skrzynce e-mail"}
 
 
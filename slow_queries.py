@@ -0,0 +1,124 @@
+from collections import deque
+from datetime import date, datetime, time
+import logging
+import random
+import re
+import sys
+from time import perf_counter
+from pydantic import BaseModel
+from sqlalchemy import event
+from config import DBEngine, ReplicaEngines, getEnv
+
+logger = logging.getLogger(__name__)
+
+SAFE_PARAMETER_TYPES = (bool, int, float, date, datetime, time, type(None))
+LOCKING_CLAUSE = re.compile(
+    r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b|\bSKIP\s+LOCKED\b|\bNOWAIT\b",
+    re.IGNORECASE,
+)
+
+
+class SlowQuery(BaseModel):
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: list | dict | None
+    caller: str | None
+    plan: list[str] | None = None
+
+
+def redact(parameters):
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(x) for x in parameters]
+    if isinstance(parameters, SAFE_PARAMETER_TYPES):
+        return parameters
+    return f"<{type(parameters).__name__}>"
+
+
+def calling_model_function() -> str | None:
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("models."):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def can_analyze(statement: str) -> bool:
+    # ANALYZE runs the query again, which would take its row locks a second time
+    return statement.lstrip().upper().startswith("SELECT") and not LOCKING_CLAUSE.search(
+        statement
+    )
+
+
+def explain(cursor, statement: str, parameters) -> list[str]:
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if can_analyze(statement) else "EXPLAIN "
+    explain_cursor = cursor.connection.cursor()
+    # a failed EXPLAIN must not abort the caller's transaction
+    explain_cursor.execute("SAVEPOINT slow_query_explain")
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        plan = [x[0] for x in explain_cursor.fetchall()]
+        explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception:
+        explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+        raise
+    finally:
+        explain_cursor.close()
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.entries: deque[SlowQuery] = deque(maxlen=getEnv().slow_query_buffer_size)
+
+    def should_explain(self, statement: str, executemany: bool) -> bool:
+        return (
+            not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < getEnv().slow_query_explain_sample_rate
+        )
+
+    def record(self, cursor, statement: str, parameters, duration: float, executemany: bool):
+        plan = None
+        if self.should_explain(statement, executemany):
+            try:
+                plan = explain(cursor, statement, parameters)
+            except Exception:
+                logger.exception("Explaining slow query failed")
+        entry = SlowQuery(
+            recorded_at=datetime.now(),
+            duration_ms=duration * 1000,
+            statement=statement,
+            parameters=redact(parameters),
+            caller=calling_model_function(),
+            plan=plan,
+        )
+        self.entries.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s", entry.duration_ms, entry.caller, statement
+        )
+
+    def list(self) -> list[SlowQuery]:
+        return sorted(self.entries, key=lambda x: x.recorded_at, reverse=True)
+
+
+slow_query_log = SlowQueryLog()
+
+
+def start_slow_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slow_query_start_time", []).append(perf_counter())
+
+
+def record_slow_query(conn, cursor, statement, parameters, context, executemany):
+    duration = perf_counter() - conn.info["slow_query_start_time"].pop()
+    if duration * 1000 >= getEnv().slow_query_threshold_ms:
+        slow_query_log.record(cursor, statement, parameters, duration, executemany)
+
+
+for engine in [DBEngine, *ReplicaEngines]:
+    event.listen(engine, "before_cursor_execute", start_slow_query_timer)
+    event.listen(engine, "after_cursor_execute", record_slow_query)
@@ -0,0 +1,191 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+import shutil
+from typing import AsyncIterator, Protocol
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from config import getEnv
+from images import ImageProcessingError, photo_variant_paths, render_variants, variant_path
+from models.photo import (
+    cancel_photo_deletions,
+    claim_photo,
+    mark_photo_stored,
+    queue_photo_deletions,
+    release_photo_reference,
+)
+from uploads import SpooledUpload, UploadTooLarge, receive_upload
+
+BUCKET = "menuitemspictures"
+LIST_PAGE_SIZE = 1000
+DELETION_POLL_SECONDS = 0.5
+
+
+class StoredObject:
+    def __init__(self, path: str, updated_at: datetime | None):
+        self.path = path
+        self.updated_at = updated_at
+
+
+class Storage(Protocol):
+    def upload(self, path: str, data: bytes, content_type: str) -> None: ...
+
+    def upload_file(self, path: str, source: Path, content_type: str) -> None: ...
+
+    def remove(self, paths: list[str]) -> None: ...
+
+    def public_url(self, path: str) -> str: ...
+
+    def list(self, prefix: str) -> list[StoredObject]: ...
+
+
+def path_from_url(url: str) -> str:
+    return url.split(BUCKET + "/")[1]
+
+
+def photo_paths_from_url(url: str) -> list[str]:
+    return photo_variant_paths(path_from_url(url))
+
+
+class SupabaseStorage:
+    def __init__(self, supabase_url: str, supabase_key: str):
+        from supabase import create_client
+
+        self.client = create_client(supabase_url=supabase_url, supabase_key=supabase_key)
+        self.bucket = self.client.storage.from_(BUCKET)
+
+    def upload(self, path: str, data: bytes, content_type: str) -> None:
+        self.bucket.upload(
+            file=data, path=path, file_options={"content-type": content_type, "x-upsert": "true"}
+        )
+
+    def upload_file(self, path: str, source: Path, content_type: str) -> None:
+        with source.open("rb") as file:
+            self.bucket.upload(
+                file=file, path=path, file_options={"content-type": content_type, "x-upsert": "true"}
+            )
+
+    def remove(self, paths: list[str]) -> None:
+        if len(paths) > 0:
+            self.bucket.remove(paths)
+
+    def public_url(self, path: str) -> str:
+        return self.bucket.get_public_url(path).split("?")[0]
+
+    def list(self, prefix: str) -> list[StoredObject]:
+        objects = []
+        offset = 0
+        while True:
+            entries = self.bucket.list(prefix, {"limit": LIST_PAGE_SIZE, "offset": offset})
+            for entry in entries:
+                path = prefix + "/" + entry["name"]
+                if entry.get("id") is None:
+                    objects.extend(self.list(path))
+                else:
+                    updated_at = entry.get("updated_at")
+                    objects.append(
+                        StoredObject(
+                            path,
+                            None
+                            if updated_at is None
+                            else datetime.fromisoformat(updated_at.replace("Z", "+00:00")).replace(tzinfo=None),
+                        )
+                    )
+            if len(entries) < LIST_PAGE_SIZE:
+                return objects
+            offset += LIST_PAGE_SIZE
+
+
+class LocalStorage:
+    def __init__(self, directory: str, base_url: str):
+        self.directory = Path(directory) / BUCKET
+        self.base_url = base_url.rstrip("/") + "/" + BUCKET + "/"
+
+    def upload(self, path: str, data: bytes, content_type: str) -> None:
+        target = self.directory / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+
+    def upload_file(self, path: str, source: Path, content_type: str) -> None:
+        target = self.directory / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+
+    def remove(self, paths: list[str]) -> None:
+        for path in paths:
+            (self.directory / path).unlink(missing_ok=True)
+
+    def public_url(self, path: str) -> str:
+        return self.base_url + path
+
+    def list(self, prefix: str) -> list[StoredObject]:
+        return [
+            StoredObject(
+                x.relative_to(self.directory).as_posix(),
+                datetime.fromtimestamp(x.stat().st_mtime),
+            )
+            for x in (self.directory / prefix).rglob("*")
+            if x.is_file()
+        ]
+
+
+@lru_cache
+def get_storage() -> Storage:
+    env = getEnv()
+    if env.storage_backend == "local":
+        return LocalStorage(env.storage_local_path, env.storage_local_url)
+    return SupabaseStorage(env.supabase_url, env.supabase_key)
+
+
+@asynccontextmanager
+async def receive_photo(file: UploadFile) -> AsyncIterator[SpooledUpload]:
+    try:
+        async with receive_upload(file, getEnv().upload_max_bytes) as upload:
+            yield upload
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Plik jest zbyt duży")
+
+
+async def store_photo(
+    db: Session, storage: Storage, file: UploadFile, directory: str
+) -> str:
+    async with receive_photo(file) as upload:
+        base_path = directory + "/" + upload.digest
+        full_path = variant_path(base_path, "full")
+        if await asyncio.to_thread(claim_photo, db, full_path, upload.digest):
+            return storage.public_url(full_path)
+        # until an upload has finished every claimant writes the objects itself, so none
+        # of them hands out a URL before they exist
+        try:
+            variants = await render_variants(upload.path)
+        except ImageProcessingError:
+            await release_photo_path(db, full_path)
+            raise HTTPException(status_code=400, detail="Nieprawidłowy plik graficzny")
+    try:
+        await wait_for_photo_deletions(db, full_path)
+        for variant, data in variants.items():
+            storage.upload(variant_path(base_path, variant), data, "image/webp")
+        await asyncio.to_thread(mark_photo_stored, db, full_path)
+    except Exception:
+        db.rollback()
+        await release_photo_path(db, full_path)
+        raise
+    return storage.public_url(full_path)
+
+
+async def wait_for_photo_deletions(db: Session, path: str):
+    # an earlier copy of these objects may be being removed right now; uploading before
+    # the collector is done would lose the new ones, so wait for it or for its lease
+    while not await asyncio.to_thread(cancel_photo_deletions, db, path):
+        await asyncio.sleep(DELETION_POLL_SECONDS)
+
+
+async def release_photo_path(db: Session, path: str):
+    if await asyncio.to_thread(release_photo_reference, db, path):
+        await asyncio.to_thread(queue_photo_deletions, db, photo_variant_paths(path))
+
+
+async def release_photo(db: Session, url: str):
+    await release_photo_path(db, path_from_url(url))
@@ -0,0 +1,46 @@
+from contextlib import asynccontextmanager
+from hashlib import sha256
+import os
+from pathlib import Path
+import tempfile
+from typing import AsyncIterator, Protocol
+
+CHUNK_SIZE = 64 * 1024
+
+
+class AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledUpload:
+    def __init__(self, path: Path, size: int, digest: str):
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+
+@asynccontextmanager
+async def receive_upload(
+    file: AsyncReadable, max_bytes: int, chunk_size: int = CHUNK_SIZE
+) -> AsyncIterator[SpooledUpload]:
+    declared_size = getattr(file, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise UploadTooLarge()
+    hash = sha256()
+    size = 0
+    descriptor, name = tempfile.mkstemp(prefix="upload-")
+    try:
+        with os.fdopen(descriptor, "wb") as target:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                hash.update(chunk)
+                target.write(chunk)
+        yield SpooledUpload(Path(name), size, hash.hexdigest())
+    finally:
+        os.unlink(name)
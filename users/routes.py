@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Annotated
 from fastapi import APIRouter, Body, Depends, HTTPException
-from config import get_db
+from config import get_db, get_read_db, getEnv
 from models.menu import (
     RestaurantMenuCategoryUser,
     RestaurantMenuItemType,
@@ -9,6 +9,8 @@ from models.menu import (
     RestaurantMenuUser,
     RestaurantOrderUser,
     get_restaurant_menu_category_items,
+    get_restaurant_menu_user,
+    get_restaurant_menu_user_items,
     get_restaurant_menu_visible_categories,
 )
 from models.reservation import (
@@ -29,8 +31,7 @@ from models.restaurant import (
     RestaurantInfo,
     RestaurantSearch,
     get_restaurant,
-    get_restaurant_flags,
-    get_restaurant_hours,
+    get_restaurant_full_info,
     get_restaurants_by_search,
 )
 from models.table import (
@@ -39,11 +40,13 @@ from models.table import (
     RestaurantTable,
     get_free_tables_for_time,
     get_restaurant_borders,
+    get_planner_info,
     get_restaurant_free_timeslots_for_day,
     get_restaurant_tables,
 )
 from models.user import User, update_user_password, validate_password
 
+from response_cache import response_cache
 from security.token import get_current_active_user, get_password_hash
 from sqlalchemy.orm import Session
 
@@ -57,12 +60,18 @@ usersRouter = APIRouter(
 
 @usersRouter.post("/restaurant-search")
 async def get_restaurants_by_search_conditions(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     options: Annotated[RestaurantSearch, Body()],
 ) -> list[RestaurantBase]:
     if not options.is_data_valid():
         raise HTTPException(400, "Nieprawidłowe dane wyszukiwania")
-    return await get_restaurants_by_search(db, options)
+    return await response_cache.get_or_build(
+        "restaurant-search",
+        None,
+        options.model_dump_json(),
+        lambda: get_restaurants_by_search(db, options),
+        ttl=getEnv().search_cache_seconds,
+    )
 
 
 @usersRouter.get("/restaurant-info")
@@ -70,15 +79,15 @@ async def get_restaurant_info(
     restaurant_id: int,
     db: Annotated[Session, Depends(get_db)],
 ) -> RestaurantInfo:
-    restaurantDB = await get_restaurant(db=db, id=restaurant_id)
-    if restaurantDB is None:
-        raise HTTPException(400, "Błędne zapytanie")
-    hours = await get_restaurant_hours(db=db, id=restaurant_id)
-    flags = await get_restaurant_flags(db=db, id=restaurant_id)
-    restaurant = RestaurantInfo(
-        **restaurantDB.to_dict(), opening_hours=hours, flags=flags
+    async def build() -> RestaurantInfo:
+        restaurant = await get_restaurant_full_info(db=db, id=restaurant_id)
+        if restaurant is None:
+            raise HTTPException(400, "Błędne zapytanie")
+        return restaurant
+
+    return await response_cache.get_or_build(
+        "restaurant-info", restaurant_id, None, build, db=db
     )
-    return restaurant
 
 
 @usersRouter.get("/restaurant-categories")
@@ -86,20 +95,12 @@ async def restaurant_menu_categories(
     db: Annotated[Session, Depends(get_db)],
     restaurant_id: int,
 ) -> RestaurantMenuUser:
-    categories = await get_restaurant_menu_visible_categories(
-        db=db, restaurant_id=restaurant_id
-    )
-    items = await get_restaurant_menu_category_items(
-        db=db, restaurant_id=restaurant_id, category_id=categories[0].id
-    )
-    return RestaurantMenuUser(
-        categories=[RestaurantMenuCategoryUser(**x.to_dict()) for x in categories],
-        items=[
-            RestaurantMenuItemUser(
-                **x.to_dict(), is_available=x.status == RestaurantMenuItemType.available
-            )
-            for x in items
-        ],
+    return await response_cache.get_or_build(
+        "restaurant-categories",
+        restaurant_id,
+        None,
+        lambda: get_restaurant_menu_user(db=db, restaurant_id=restaurant_id),
+        db=db,
     )
 
 
@@ -109,32 +110,27 @@ async def restaurant_menu_items(
     restaurant_id: int,
     category_id: int,
 ) -> list[RestaurantMenuItemUser]:
-    items = await get_restaurant_menu_category_items(
-        db=db, restaurant_id=restaurant_id, category_id=category_id
+    return await response_cache.get_or_build(
+        "restaurant-category-items",
+        restaurant_id,
+        category_id,
+        lambda: get_restaurant_menu_user_items(
+            db=db, restaurant_id=restaurant_id, category_id=category_id
+        ),
+        db=db,
     )
-    return [
-        RestaurantMenuItemUser(
-            **x.to_dict(), is_available=x.status == RestaurantMenuItemType.available
-        )
-        for x in items
-    ]
 
 
 @usersRouter.get("/planner-info")
 async def get_restaurant_planner_info(
     restaurant_id: int, db: Annotated[Session, Depends(get_db)]
 ) -> PlannerInfo:
-    tables = [
-        RestaurantTable(**x.to_dict())
-        for x in await get_restaurant_tables(db=db, restaurant_id=restaurant_id)
-    ]
-    borders = [
-        RestaurantBorder(**x.to_dict())
-        for x in await get_restaurant_borders(db=db, restaurant_id=restaurant_id)
-    ]
-    restaurant = await get_restaurant(db=db, id=restaurant_id)
-    return PlannerInfo(
-        precision=restaurant.plan_precision, tables=tables, borders=borders
+    return await response_cache.get_or_build(
+        "planner-info",
+        restaurant_id,
+        None,
+        lambda: get_planner_info(db=db, restaurant_id=restaurant_id),
+        db=db,
     )
 
 
@@ -143,7 +139,7 @@ async def get_restaurant_date_available_times(
     restaurant_id: int,
     date: datetime,
     guests_amount: int,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
 ) -> list[datetime]:
     if date.date() < datetime.now().date():
         raise HTTPException(400, "Błędne zapytanie")
@@ -154,7 +150,7 @@ async def get_restaurant_date_available_times(
 
 @usersRouter.get("/available-tables-for-time")
 async def get_restaurant_time_available_tables(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     restaurant_id: int,
     date: datetime,
     guests_amount: int,
@@ -266,32 +262,16 @@ async def reservation_order_items(
     reservation = await get_reservation(db, reservation_id, user.id)
     if reservation is None:
         raise HTTPException(400, "Wybrana rezerwacja nie istnieje")
-    categories = await get_restaurant_menu_visible_categories(
-        db=db, restaurant_id=reservation.restaurant_id
-    )
-    items = await get_restaurant_menu_category_items(
-        db=db, restaurant_id=reservation.restaurant_id, category_id=categories[0].id
-    )
-    
     return RestaurantOrderUser(
         restaurant_id=reservation.restaurant_id,
         current_order={int(k): int(v["count"]) for (k, v) in reservation.order.items()},
-        menu=RestaurantMenuUser(
-            categories=[RestaurantMenuCategoryUser(**x.to_dict()) for x in categories],
-            items=[
-                RestaurantMenuItemUser(
-                    **x.to_dict(),
-                    is_available=x.status == RestaurantMenuItemType.available
-                )
-                for x in items
-            ],
-        ),
+        menu=await get_restaurant_menu_user(db=db, restaurant_id=reservation.restaurant_id),
     )
 
 @usersRouter.get("/reservations-history")
 async def reservations_history(
     user: Annotated[User, Depends(get_current_active_user)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     page: int,
 ) -> list[Reservation]:
     return await get_current_user_reservations_history(db, user.id, page)
@@ -1,12 +1,13 @@
 from typing import Annotated
 from fastapi import APIRouter, Body, Depends, HTTPException, Security
 from config import get_db
-from models.menu import RestaurantMenuCategoryUser, RestaurantMenuItemType, RestaurantMenuItemUser, RestaurantMenuUser, RestaurantOrderUser, get_restaurant_menu_category_items, get_restaurant_menu_visible_categories
-from models.reservation import Reservation, create_waiter_reservation, get_reservation, get_restaurant_current_reservations, get_restaurant_needing_service_reservations_count, get_restaurant_pending_reservations, get_restaurant_pending_reservations_count, get_restaurant_table_coming_reservations_count, get_restaurant_todays_reservations, update_pending_reservation_status, update_reservation_order
+from models.menu import RestaurantMenuCategoryUser, RestaurantMenuItemType, RestaurantMenuItemUser, RestaurantMenuUser, RestaurantOrderUser, get_restaurant_menu_category_items, get_restaurant_menu_user, get_restaurant_menu_user_items, get_restaurant_menu_visible_categories
+from models.reservation import Reservation, create_waiter_reservation, get_reservation, get_restaurant_current_reservations, get_restaurant_needing_service_reservations_count, get_restaurant_pending_reservations, get_restaurant_pending_reservations_count, get_restaurant_table_coming_reservations_count, get_restaurant_tables_coming_reservations_count, get_restaurant_todays_reservations, update_pending_reservation_status, update_reservation_order
 from models.restaurant import get_restaurant
-from models.table import PlannerInfo, RestaurantBorder, RestaurantTable, get_restaurant_borders, get_restaurant_tables, is_table_free_now
+from models.table import PlannerInfo, RestaurantBorder, RestaurantTable, get_planner_info, get_restaurant_borders, get_restaurant_tables, is_table_free_now
 from models.user import Worker, update_worker_password, validate_password
 from sqlalchemy.orm import Session
+from response_cache import response_cache
 
 
 from security.token import get_current_active_user
@@ -24,17 +25,12 @@ async def get_restaurant_planner_info(
     worker: Annotated[Worker, Depends(get_current_active_user)],
     db: Annotated[Session, Depends(get_db)],
 ) -> PlannerInfo:
-    tables = [
-        RestaurantTable(**x.to_dict())
-        for x in await get_restaurant_tables(db=db, restaurant_id=worker.restaurant_id)
-    ]
-    borders = [
-        RestaurantBorder(**x.to_dict())
-        for x in await get_restaurant_borders(db=db, restaurant_id=worker.restaurant_id)
-    ]
-    restaurant = await get_restaurant(db=db, id=worker.restaurant_id)
-    return PlannerInfo(
-        precision=restaurant.plan_precision, tables=tables, borders=borders
+    return await response_cache.get_or_build(
+        "planner-info",
+        worker.restaurant_id,
+        None,
+        lambda: get_planner_info(db=db, restaurant_id=worker.restaurant_id),
+        db=db,
     )
 
 @workersRouter.get("/todays-reservations")
@@ -52,6 +48,13 @@ async def table_coming_reservations(
 ) -> dict[int,int]:
     return await get_restaurant_table_coming_reservations_count(db, worker.restaurant_id, table_real_id)
 
+@workersRouter.get("/tables-coming-reservations")
+async def tables_coming_reservations(
+    worker: Annotated[Worker, Depends(get_current_active_user)],
+    db: Annotated[Session, Depends(get_db)],
+) -> dict[str,dict[int,int]]:
+    return await get_restaurant_tables_coming_reservations_count(db, worker.restaurant_id)
+
 @workersRouter.get("/pending-reservations")
 async def pending_reservations(
     worker: Annotated[Worker, Depends(get_current_active_user)],
@@ -103,15 +106,15 @@ async def restaurant_menu_items(
     worker: Annotated[Worker, Depends(get_current_active_user)],
     category_id: int,
 ) -> list[RestaurantMenuItemUser]:
-    items = await get_restaurant_menu_category_items(
-        db=db, restaurant_id=worker.restaurant_id, category_id=category_id
+    return await response_cache.get_or_build(
+        "restaurant-category-items",
+        worker.restaurant_id,
+        category_id,
+        lambda: get_restaurant_menu_user_items(
+            db=db, restaurant_id=worker.restaurant_id, category_id=category_id
+        ),
+        db=db,
     )
-    return [
-        RestaurantMenuItemUser(
-            **x.to_dict(), is_available=x.status == RestaurantMenuItemType.available
-        )
-        for x in items
-    ]
 
 @workersRouter.get("/reservation-order-items")
 async def current_reservations(
@@ -120,29 +123,12 @@ async def current_reservations(
     reservation_id: int,
 ) -> RestaurantOrderUser:
     reservation = await get_reservation(db, reservation_id, None)
-    print(reservation)
     if reservation is None or reservation.restaurant_id != worker.restaurant_id:
         raise HTTPException(400, "Wybrana rezerwacja nie istnieje")
-    categories = await get_restaurant_menu_visible_categories(
-        db=db, restaurant_id=reservation.restaurant_id
-    )
-    items = await get_restaurant_menu_category_items(
-        db=db, restaurant_id=reservation.restaurant_id, category_id=categories[0].id
-    )
-    
     return RestaurantOrderUser(
         restaurant_id=reservation.restaurant_id,
         current_order={int(k): int(v["count"]) for (k, v) in reservation.order.items()},
-        menu=RestaurantMenuUser(
-            categories=[RestaurantMenuCategoryUser(**x.to_dict()) for x in categories],
-            items=[
-                RestaurantMenuItemUser(
-                    **x.to_dict(),
-                    is_available=x.status == RestaurantMenuItemType.available
-                )
-                for x in items
-            ],
-        ),
+        menu=await get_restaurant_menu_user(db=db, restaurant_id=reservation.restaurant_id),
     )
 
 @workersRouter.post('/update-order')